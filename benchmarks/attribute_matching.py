@@ -0,0 +1,112 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Compare the per-attribute scoring loop with AttributeMatcher over synthetic
+# result descriptions and check that both give identical scores.
+#
+# Usage: python benchmarks/attribute_matching.py [--sizes N [N ...]] [--seed N]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subdivx_dl.utils import AttributeMatcher, get_attribute_weights, normalize_description
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+REPEATS = 3
+
+# A search naming most attributes and a typical one naming only a few
+QUERIES = {
+    'full': {
+        'edition': 'Directors Cut',
+        'source': 'BluRay',
+        'release_group': 'SPARKS',
+        'screen_size': '1080p',
+        'video_codec': '264',
+        'other': 'Remux'
+    },
+    'typical': {
+        'source': 'BluRay',
+        'screen_size': '1080p'
+    }
+}
+
+WORDS = [
+    'subtitulos', 'para', 'la', 'version', 'bluray', 'blu-ray', 'web-dl', 'webrip', 'hdtv',
+    '720p', '1080p', '2160p', 'x264', 'x265', 'h264', 'sparks', 'yts', 'rarbg', 'remux',
+    "director's", 'cut', 'extended', 'sincronizados', 'traduccion', 'propia', 'gracias'
+]
+
+def make_descriptions(size, seed):
+    rng = random.Random(seed)
+    return [
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 30))).title()
+        for _ in range(size)
+    ]
+
+def score_per_attribute(key_values, weights, description):
+    # Scoring as done before AttributeMatcher, one substring search per key
+    subtitle_description = description.replace('Blu-Ray', 'BluRay').lower()
+    subtitle_description = subtitle_description.replace('director\'s', 'directors')
+
+    score = 0
+    for key in weights.keys():
+        try:
+            attribute = key_values[key].lower()
+
+            if attribute in subtitle_description:
+                score += weights[key]
+        except KeyError:
+            pass
+
+    return score
+
+def best_time(function):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def run(size, seed):
+    descriptions = make_descriptions(size, seed)
+    weights = get_attribute_weights()
+
+    for name, key_values in QUERIES.items():
+        baseline, expected = best_time(
+            lambda: [score_per_attribute(key_values, weights, description) for description in descriptions]
+        )
+
+        def score_all():
+            matcher = AttributeMatcher(key_values, weights)
+            return [matcher.score(normalize_description(description)) for description in descriptions]
+
+        compiled, scores = best_time(score_all)
+
+        if scores != expected:
+            print(f'FAIL: scores differ for {size} rows of the {name} query')
+            sys.exit(1)
+
+        print(
+            f'{size:>8} rows  {name:<8} per-attribute {baseline * 1000:9.1f} ms  '
+            f'matcher {compiled * 1000:9.1f} ms  speedup {baseline / compiled:5.2f}x'
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the attribute matching of search results')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='number of synthetic results')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic results')
+    options = parser.parse_args()
+
+    for size in options.sizes:
+        run(size, options.seed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Compare the memory of search results parsed as before, json.loads of the
+# whole body and a dict per row, with the rows of SearchResult streamed from
+# the body, and the time until the first page of rows is available.
+#
+# Usage: python benchmarks/result_memory.py [--sizes N [N ...]] [--page N] [--seed N]
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subdivx_dl.utils import SEARCH_CHUNK_SIZE, SearchResult, SearchResults, iter_json_array, parse_date
+
+DEFAULT_SIZES = [1000, 10000]
+
+DEFAULT_PAGE = 20
+
+WORDS = [
+    'subtitulos', 'para', 'la', 'version', 'bluray', 'web-dl', 'webrip', 'hdtv', '720p', '1080p',
+    'x264', 'sparks', 'yts', 'rarbg', 'sincronizados', 'traduccion', 'propia', 'gracias'
+]
+
+def make_body(size, seed):
+    rng = random.Random(seed)
+    rows = [
+        {
+            'id': 400000 + index,
+            'titulo': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title(),
+            'descripcion': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))),
+            'descargas': rng.randint(0, 50000),
+            'nick': rng.choice(WORDS),
+            'fecha_subida': f'20{rng.randint(10, 24)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} 12:00:00'
+        }
+        for index in range(size)
+    ]
+    return json.dumps({'sEcho': '1', 'iTotalRecords': size, 'aaData': rows}).encode()
+
+def parse_date_legacy(date):
+    # Date parsing as done before the rows kept day ordinals
+    try:
+        return datetime.strptime(date, '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y')
+    except ValueError:
+        return None
+
+def parse_dicts(body):
+    # Parsing as done before SearchResult
+    return [
+        {
+            'id_subtitle': result['id'],
+            'title': result['titulo'],
+            'description': result['descripcion'],
+            'downloads': result['descargas'],
+            'uploader': result['nick'],
+            'upload_date': parse_date_legacy(result['fecha_subida']) if result['fecha_subida'] else '-'
+        }
+        for result in json.loads(body).get('aaData')
+    ]
+
+def parse_records(body):
+    chunks = (body[index:index + SEARCH_CHUNK_SIZE] for index in range(0, len(body), SEARCH_CHUNK_SIZE))
+    return SearchResults(
+        SearchResult(
+            result['id'],
+            result['titulo'],
+            result['descripcion'],
+            result['descargas'],
+            result['nick'],
+            parse_date(result['fecha_subida'])
+        )
+        for result in iter_json_array(chunks, 'aaData')
+    )
+
+def measure(function):
+    # Returns the result, the bytes it retains and the peak while building it
+    tracemalloc.start()
+    result = function()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak
+
+def first_page_time(function, page):
+    start = time.perf_counter()
+    rows = function()
+    rows[0:page]
+    return time.perf_counter() - start
+
+def run(size, page, seed):
+    body = make_body(size, seed)
+
+    _, dicts_retained, dicts_peak = measure(lambda: parse_dicts(body))
+    _, records_retained, records_peak = measure(lambda: parse_records(body)[:])
+
+    dicts_first = first_page_time(lambda: parse_dicts(body), page)
+    records_first = first_page_time(lambda: parse_records(body), page)
+
+    print(
+        f'{size:>8} rows  dicts {dicts_retained / size:6.0f} B/row (peak {dicts_peak / size:6.0f})  '
+        f'records {records_retained / size:6.0f} B/row (peak {records_peak / size:6.0f})  '
+        f'first page {dicts_first * 1000:7.1f} ms -> {records_first * 1000:6.1f} ms'
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the memory of parsed search results')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='number of synthetic results')
+    parser.add_argument('--page', type=int, default=DEFAULT_PAGE, help='number of rows of the first page')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic results')
+    options = parser.parse_args()
+
+    for size in options.sizes:
+        run(size, options.page, options.seed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Measure the cold start of subdivx-dl with python -X importtime and fail
+# when it exceeds the budget or when a heavy dependency is loaded eagerly.
+#
+# Usage: python benchmarks/startup_budget.py [--budget-ms MS] [--runs N] [--allow MODULE] [-- ARGS...]
+
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+DEFAULT_BUDGET_MS = 60
+DEFAULT_RUNS = 7
+DEFAULT_ARGS = ['--version']
+
+# Modules that only the search, download and display paths may load
+HEAVY_MODULES = ('guessit', 'rebulk', 'babelfish', 'tabulate', 'patoolib', 'urllib3')
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$')
+
+def measure(cli_args):
+    # Returns the cumulative import time of subdivx_dl in microseconds and
+    # the set of top level modules imported during the run
+    # Bytecode must be written for the warm up run to fill the cache
+    environment = dict(os.environ)
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'subdivx_dl.main', *cli_args],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+
+    total = 0
+    modules = set()
+
+    for line in process.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match is None:
+            continue
+
+        cumulative, indent, module = int(match.group(2)), match.group(3), match.group(4)
+        modules.add(module.split('.')[0])
+
+        # Only direct imports of the entry point, nested ones are already counted
+        if len(indent) == 1 and module.startswith('subdivx_dl'):
+            total += cumulative
+
+    return total, modules
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the subdivx-dl startup budget')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='maximum median import time')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='number of measured runs')
+    parser.add_argument('--allow', action='append', default=[], metavar='MODULE', help='heavy module allowed to load')
+    parser.add_argument('cli_args', nargs='*', default=DEFAULT_ARGS, help='arguments passed to subdivx-dl')
+    options = parser.parse_args()
+
+    # Warm up the bytecode cache so every run measures the same thing
+    measure(options.cli_args)
+
+    timings = []
+    loaded = set()
+    for _ in range(options.runs):
+        total, modules = measure(options.cli_args)
+        timings.append(total / 1000)
+        loaded |= modules
+
+    median = statistics.median(timings)
+    heavy = sorted(loaded.intersection(HEAVY_MODULES).difference(options.allow))
+
+    print(f'Arguments: {" ".join(options.cli_args)}')
+    print(f'Import time: median {median:.1f} ms, min {min(timings):.1f} ms, max {max(timings):.1f} ms')
+    print(f'Budget: {options.budget_ms:.1f} ms')
+
+    failed = False
+
+    if median > options.budget_ms:
+        print(f'FAIL: median import time exceeds the budget by {median - options.budget_ms:.1f} ms')
+        failed = True
+
+    if heavy:
+        print(f'FAIL: heavy modules imported at startup: {", ".join(heavy)}')
+        failed = True
+
+    if not failed:
+        print('OK')
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Compare the sanitization of search results with the former filter_text,
+# applied eagerly to every row, against the single pass filter_text applied
+# to every row (scoring) or lazily to the rows of one page (rendering), and
+# check that both versions of filter_text give identical text.
+#
+# Usage: python benchmarks/text_sanitization.py [--sizes N [N ...]] [--page N] [--seed N]
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subdivx_dl.utils import SearchResult, filter_text
+
+DEFAULT_SIZES = [10000]
+
+DEFAULT_PAGE = 20
+
+REPEATS = 3
+
+WORDS = [
+    'subtitulos', 'para', 'la', 'version', 'bluray', 'web-dl', 'webrip', 'hdtv', '720p', '1080p',
+    'x264', 'sparks', 'yts', 'rarbg', 'sincronizados', 'traduccion', 'propia', 'gracias', 'a'
+]
+
+# Markup found in real descriptions, most of them have none
+MARKUP = ['<br />', '<b>', '</b>', '&amp;', '&quot;', '\\"', '\\\\\\"', '\\´', '  ']
+
+def filter_text_legacy(text):
+    # filter_text as it was before the single pass version
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'(?<=\S) {2,}(?=\S)', ' ', text)
+    text = text.replace('&amp;', '&')
+    text = text.replace('&quot;', '"')
+    text = re.sub(r'\\{1,3}"', '"', text)
+    text = text.replace('\´', '')
+    return text
+
+def make_text(rng, length, markup_ratio):
+    words = []
+    for _ in range(length):
+        words.append(rng.choice(WORDS))
+        if rng.random() < markup_ratio:
+            words.append(rng.choice(MARKUP))
+    return ' '.join(words)
+
+def make_rows(size, seed):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(size):
+        # A third of the descriptions carry some markup
+        markup_ratio = 0.2 if rng.random() < 0.33 else 0
+        rows.append({
+            'id_subtitle': index,
+            'raw_title': make_text(rng, rng.randint(2, 6), markup_ratio / 4),
+            'raw_description': make_text(rng, rng.randint(5, 40), markup_ratio)
+        })
+    return rows
+
+def best_time(function):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def run(size, page, seed):
+    rows = make_rows(size, seed)
+
+    legacy, expected = best_time(
+        lambda: [(filter_text_legacy(row['raw_title']), filter_text_legacy(row['raw_description'])) for row in rows]
+    )
+
+    single_pass, texts = best_time(
+        lambda: [(filter_text(row['raw_title']), filter_text(row['raw_description'])) for row in rows]
+    )
+
+    if texts != expected:
+        print(f'FAIL: sanitized text differs for {size} rows')
+        sys.exit(1)
+
+    def render_page():
+        results = [
+            SearchResult(row['id_subtitle'], row['raw_title'], row['raw_description'], 0, '', 0)
+            for row in rows
+        ]
+        return [(result.title, result.description) for result in results[:page]]
+
+    lazy, _ = best_time(render_page)
+
+    print(
+        f'{size:>8} rows  eager legacy {legacy * 1000:8.1f} ms  eager single pass {single_pass * 1000:8.1f} ms  '
+        f'({legacy / single_pass:4.2f}x)  lazy page of {page} {lazy * 1000:7.1f} ms  ({legacy / lazy:5.1f}x)'
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sanitization of search results')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='number of synthetic results')
+    parser.add_argument('--page', type=int, default=DEFAULT_PAGE, help='number of rows rendered lazily')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic results')
+    options = parser.parse_args()
+
+    for size in options.sizes:
+        run(size, options.page, options.seed)
+
+if __name__ == '__main__':
+    main()
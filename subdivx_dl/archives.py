@@ -0,0 +1,129 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import shutil
+import subprocess
+
+from subdivx_dl import helper
+
+def parse_7z_listing(output):
+    # Technical listing, one "Key = value" block per member after the separator
+    members = []
+    member = None
+
+    for line in output.split('----------', 1)[-1].splitlines():
+        key, _, value = line.partition(' = ')
+        if key == 'Path':
+            member = {'name': value, 'size': 0, 'is_dir': False}
+            members.append(member)
+        elif member is not None and key == 'Size':
+            member['size'] = int(value or 0)
+        elif member is not None and key in ('Folder', 'Attributes'):
+            member['is_dir'] = member['is_dir'] or value == '+' or value.startswith('D')
+
+    return members
+
+def parse_unrar_listing(output):
+    # Technical listing, one "Key: value" block per member
+    members = []
+    member = None
+
+    for line in output.splitlines():
+        key, _, value = line.strip().partition(': ')
+        if key == 'Name':
+            member = {'name': value, 'size': 0, 'is_dir': False}
+            members.append(member)
+        elif member is not None and key == 'Size':
+            member['size'] = int(value or 0)
+        elif member is not None and key == 'Type':
+            member['is_dir'] = value == 'Directory'
+
+    return members
+
+def parse_bsdtar_listing(output):
+    # ls -l like lines: mode, links, owner, group, size, month, day, time and name
+    members = []
+
+    for line in output.splitlines():
+        fields = line.split(None, 8)
+        if len(fields) == 9:
+            members.append({'name': fields[8], 'size': int(fields[4]), 'is_dir': fields[0].startswith('d')})
+
+    return members
+
+# Programs able to list an archive and extract some of its members by name
+ARCHIVE_TOOLS = (
+    (
+        ('7zz', '7z', '7za'),
+        lambda tool, archive: [tool, 'l', '-slt', archive],
+        parse_7z_listing,
+        lambda tool, archive, names, dest_dir: [tool, 'x', '-y', '-bd', f'-o{dest_dir}', archive, '--', *names]
+    ),
+    (
+        ('unrar',),
+        lambda tool, archive: [tool, 'lt', archive],
+        parse_unrar_listing,
+        lambda tool, archive, names, dest_dir: [tool, 'x', '-y', '-inul', '--', archive, *names, dest_dir + os.sep]
+    ),
+    (
+        ('bsdtar',),
+        lambda tool, archive: [tool, '-tvf', archive],
+        parse_bsdtar_listing,
+        lambda tool, archive, names, dest_dir: [tool, '-xf', archive, '-C', dest_dir, '--', *names]
+    )
+)
+
+def run_tool(command):
+    try:
+        return subprocess.run(command, capture_output=True, text=True, errors='replace')
+    except OSError as error:
+        helper.logger.warning(f'Failed to run {command[0]}: {error}')
+        return None
+
+def list_archive(archive):
+    # Returns the members of archive, the program that listed them and the
+    # command to extract some of them, or None when no program can list it
+    for names, list_command, parse_listing, extract_command in ARCHIVE_TOOLS:
+        for name in names:
+            tool = shutil.which(name)
+            if tool is None:
+                continue
+
+            result = run_tool(list_command(tool, archive))
+            if result is None or result.returncode != 0:
+                helper.logger.info(f'{name} failed to list [{os.path.basename(archive)}]')
+                continue
+
+            return parse_listing(result.stdout), tool, extract_command
+
+    return None
+
+def extract_members(archive, tool, extract_command, names, dest_dir):
+    result = run_tool(extract_command(tool, archive, names, dest_dir))
+    return result is not None and result.returncode == 0
+
+# -- Class ExtractionStats -- #
+class ExtractionStats():
+    def __init__(self):
+        # Totals of a single extraction, nested archives included
+        self.archives = 0
+        self.extracted_members = 0
+        self.extracted_bytes = 0
+        self.skipped_members = 0
+        self.skipped_bytes = 0
+
+    def record(self, extracted, skipped):
+        # extracted and skipped are lists of member sizes
+        self.archives += 1
+        self.extracted_members += len(extracted)
+        self.extracted_bytes += sum(extracted)
+        self.skipped_members += len(skipped)
+        self.skipped_bytes += sum(skipped)
+
+    def get_summary(self):
+        return (
+            f'{self.archives} archives, extracted {self.extracted_members} members '
+            f'({self.extracted_bytes} bytes), skipped {self.skipped_members} members '
+            f'({self.skipped_bytes} bytes)'
+        )
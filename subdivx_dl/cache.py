@@ -0,0 +1,350 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import sqlite3
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+from subdivx_dl import helper
+
+# Entries written before this time are bypassed with refresh, the ones the
+# process stores itself are reused (e.g. by the searches of a batch)
+PROCESS_STARTED = time.time()
+
+# -- Class SQLiteCache -- #
+class SQLiteCache():
+    _PATH_DATA = os.path.join(tempfile.gettempdir(), 'sdx-dl-cache.sqlite3')
+
+    def __init__(self, namespace, ttl, max_bytes, refresh=False):
+        # Entries of each namespace expire after ttl seconds and are evicted
+        # least recently used first once their total size exceeds max_bytes.
+        # With refresh, entries written before the process started miss so
+        # each one is fetched and stored again
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._PATH_DATA, timeout=10, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                'size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL, '
+                'PRIMARY KEY (namespace, key))'
+            )
+        return self._connection
+
+    def get(self, key):
+        now = time.time()
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    'SELECT value, created FROM entries WHERE namespace = ? AND key = ?',
+                    (self.namespace, key)
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                value, created = row
+                if self.refresh and created < PROCESS_STARTED:
+                    return None
+
+                with connection:
+                    if now - created >= self.ttl:
+                        connection.execute(
+                            'DELETE FROM entries WHERE namespace = ? AND key = ?', (self.namespace, key)
+                        )
+                        return None
+
+                    connection.execute(
+                        'UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?',
+                        (now, self.namespace, key)
+                    )
+        except sqlite3.Error as error:
+            helper.logger.warning(f'Cache [{self.namespace}] read failed: {error}')
+            return None
+
+        return json.loads(value)
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        # Stores the (key, value) pairs in one transaction, evicting once
+        now = time.time()
+        rows = []
+        for key, value in items:
+            data = json.dumps(value)
+            rows.append((self.namespace, key, data, len(data), now, now))
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    connection.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)', rows)
+                    self._evict(connection, now)
+        except sqlite3.Error as error:
+            helper.logger.warning(f'Cache [{self.namespace}] write failed: {error}')
+
+    def _evict(self, connection, now):
+        connection.execute(
+            'DELETE FROM entries WHERE namespace = ? AND created <= ?', (self.namespace, now - self.ttl)
+        )
+
+        total_size = connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+
+        if total_size <= self.max_bytes:
+            return
+
+        rows = connection.execute(
+            'SELECT key, size FROM entries WHERE namespace = ? ORDER BY accessed', (self.namespace,)
+        ).fetchall()
+
+        evicted_keys = []
+        for key, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            evicted_keys.append((self.namespace, key))
+            total_size -= size
+
+        connection.executemany('DELETE FROM entries WHERE namespace = ? AND key = ?', evicted_keys)
+        helper.logger.info(f'Cache [{self.namespace}] evicted {len(evicted_keys)} entries')
+
+# -- Class ArchiveCache -- #
+class ArchiveCache():
+    _PATH_DATA = SQLiteCache._PATH_DATA
+    _PATH_ARCHIVES = os.path.join(tempfile.gettempdir(), 'sdx-dl-archives')
+
+    def __init__(self, ttl, max_bytes, refresh=False):
+        # Archives are stored once per content hash and indexed by subtitle id,
+        # the least recently used are evicted once they exceed max_bytes
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(self._PATH_ARCHIVES, exist_ok=True)
+            self._connection = sqlite3.connect(self._PATH_DATA, timeout=10, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS archives ('
+                'id_subtitle TEXT PRIMARY KEY, digest TEXT NOT NULL, extension TEXT NOT NULL, '
+                'size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+        return self._connection
+
+    def _get_path(self, digest, extension):
+        return os.path.join(self._PATH_ARCHIVES, f'{digest}{extension}')
+
+    def get(self, id_subtitle):
+        # Returns the extension and the path of the stored archive, with
+        # refresh only those stored since the process started
+        now = time.time()
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    'SELECT digest, extension, created FROM archives WHERE id_subtitle = ?', (str(id_subtitle),)
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                digest, extension, created = row
+                if self.refresh and created < PROCESS_STARTED:
+                    return None
+
+                path = self._get_path(digest, extension)
+
+                with connection:
+                    if now - created >= self.ttl or not os.path.exists(path):
+                        connection.execute('DELETE FROM archives WHERE id_subtitle = ?', (str(id_subtitle),))
+                        return None
+
+                    connection.execute(
+                        'UPDATE archives SET accessed = ? WHERE id_subtitle = ?', (now, str(id_subtitle))
+                    )
+        except sqlite3.Error as error:
+            helper.logger.warning(f'Archive cache read failed: {error}')
+            return None
+
+        return extension, path
+
+    def put(self, id_subtitle, extension, data):
+        digest = hashlib.sha256(data).hexdigest()
+        self._store(id_subtitle, extension, digest, len(data), lambda file: file.write(data))
+
+    def put_file(self, id_subtitle, extension, source_path, digest):
+        # The archive is copied from disk, digest is hashed by the caller while writing it
+        def copy(file):
+            with open(source_path, 'rb') as source:
+                shutil.copyfileobj(source, file)
+
+        try:
+            size = os.path.getsize(source_path)
+        except OSError as error:
+            helper.logger.warning(f'Archive cache write failed: {error}')
+            return
+
+        self._store(id_subtitle, extension, digest, size, copy)
+
+    def _store(self, id_subtitle, extension, digest, size, write):
+        now = time.time()
+        path = self._get_path(digest, extension)
+
+        try:
+            with self._lock:
+                connection = self._connect()
+
+                # Same content under another id is already stored
+                if not os.path.exists(path):
+                    # Unique temporary name, other threads and processes may store the same blob
+                    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+                    try:
+                        with os.fdopen(descriptor, 'wb') as file:
+                            write(file)
+                        os.replace(temp_path, path)
+                    except OSError:
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
+                        raise
+
+                with connection:
+                    connection.execute(
+                        'INSERT OR REPLACE INTO archives VALUES (?, ?, ?, ?, ?, ?)',
+                        (str(id_subtitle), digest, extension, size, now, now)
+                    )
+                    self._evict(connection, now)
+        except (OSError, sqlite3.Error) as error:
+            helper.logger.warning(f'Archive cache write failed: {error}')
+
+    def _evict(self, connection, now):
+        rows = connection.execute(
+            'SELECT id_subtitle, digest, extension, size, created FROM archives ORDER BY accessed DESC'
+        ).fetchall()
+
+        # Walk from the most recently used, each content counts once
+        total_size = 0
+        kept_digests = set()
+        evicted_ids = []
+
+        for id_subtitle, digest, extension, size, created in rows:
+            if now - created >= self.ttl:
+                evicted_ids.append((id_subtitle,))
+            elif digest in kept_digests:
+                continue
+            elif total_size + size > self.max_bytes:
+                evicted_ids.append((id_subtitle,))
+            else:
+                total_size += size
+                kept_digests.add(digest)
+
+        if not evicted_ids:
+            return
+
+        connection.executemany('DELETE FROM archives WHERE id_subtitle = ?', evicted_ids)
+
+        for id_subtitle, digest, extension, size, created in rows:
+            if digest not in kept_digests:
+                try:
+                    os.remove(self._get_path(digest, extension))
+                except FileNotFoundError:
+                    pass
+                kept_digests.add(digest)
+
+        helper.logger.info(f'Archive cache evicted {len(evicted_ids)} entries')
+
+def to_json_value(value):
+    # guessit returns objects such as Size or Language, only their text is used
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    return str(value)
+
+# -- Class GuessitCache -- #
+class GuessitCache():
+    def __init__(self, store=None, max_entries=1024, flush_size=64):
+        # Parses are kept in a bounded LRU and in the persistent store, keyed
+        # by the guessit version so an upgrade never serves stale results.
+        # New parses reach the store flush_size at a time and on flush()
+        self.store = store
+        self.max_entries = max_entries
+        self.flush_size = flush_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = []
+        self._version = None
+
+    def _get_version(self):
+        if self._version is None:
+            from importlib.metadata import version, PackageNotFoundError
+            try:
+                self._version = version('guessit')
+            except PackageNotFoundError:
+                from guessit import __version__
+                self._version = __version__
+        return self._version
+
+    def parse(self, string):
+        with self._lock:
+            info = self._entries.get(string)
+            if info is not None:
+                self._entries.move_to_end(string)
+                return dict(info)
+
+        key = f'{self._get_version()}:{string}'
+        info = self.store.get(key) if self.store else None
+
+        flushed = None
+
+        if info is None:
+            from guessit import guessit
+            info = {name: to_json_value(value) for name, value in guessit(string).items()}
+
+            if self.store:
+                with self._lock:
+                    self._pending.append((key, info))
+                    if len(self._pending) >= self.flush_size:
+                        flushed, self._pending = self._pending, []
+
+        with self._lock:
+            self._entries[string] = info
+            self._entries.move_to_end(string)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        if flushed:
+            self.store.put_many(flushed)
+
+        # Return a copy so callers can normalize values without touching the cache
+        return dict(info)
+
+    def flush(self):
+        # Stores the parses still pending, called before the process exits
+        with self._lock:
+            flushed, self._pending = self._pending, []
+
+        if flushed and self.store:
+            self.store.put_many(flushed)
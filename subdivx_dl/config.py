@@ -0,0 +1,86 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import json
+
+from subdivx_dl import helper
+
+# -- Class Args -- #
+class Args():
+    def __init__(self, args=None, config=None):
+        super().__init__()
+
+        self.SEARCH = None
+
+        if args is not None:
+            for key, value in args.__dict__.items():
+                setattr(self, key, value)
+
+        if config is not None:
+            for key, value in config.items():
+                setattr(self, key, value)
+            self.SEARCH = args.SEARCH
+
+    def get_args(self):
+        arguments = []
+
+        for attribute, value in self.__dict__.items():
+            if attribute != 'SEARCH' and value is not False and value is not None:
+                arguments.append(f'{attribute}={value}')
+
+        return arguments
+
+# -- Class Config -- #
+class Config():
+    _CONFIG_FILE_NAME = 'config.json'
+
+    def __init__(self):
+        self.config_directory = self._create_config_directory()
+        self.config_path = os.path.join(self.config_directory, self._CONFIG_FILE_NAME)
+
+    def _create_config_directory(self):
+        import platform
+        platform_name = platform.system()
+
+        local_appdata = os.getenv('LOCALAPPDATA')
+
+        directory_paths = {
+            'Linux': '~/.config/subdivx-dl/',
+            'Darwin': '~/Library/Application Support/subdivx-dl/',
+            'Windows': f'{local_appdata}\\subdivx-dl\\'
+        }
+
+        config_directory = os.path.expanduser(directory_paths[platform_name])
+        os.makedirs(config_directory, exist_ok=True)
+
+        return config_directory
+
+    def save_config(self, args):
+        args_copy = args.__dict__.copy()
+
+        # Remove keys that are not needed in the config file
+        keys_to_remove = {'SEARCH', 'load_config', 'save_config', 'check_update', 'batch', 'batch_report', 'scan', 'daemon'}
+
+        # Remove keys that have empty values, an explicit 0 (e.g. --max-retries 0) is kept
+        keys_to_remove.update(
+            key for key, value in args_copy.items() if value is None or value is False or value in ('', [])
+        )
+
+        # Remove the identified keys
+        for key in keys_to_remove:
+            args_copy.pop(key, None)
+
+        with open(self.config_path, 'w') as file:
+            json.dump(args_copy, file, indent=4, sort_keys=True)
+
+        helper.logger.info(f'Save configuration file {self.config_path}')
+
+    def load_config(self):
+        if not os.path.exists(self.config_path):
+            helper.logger.info('Not found configuration file, usage default values')
+            return {}
+
+        with open(self.config_path, 'r') as file:
+            helper.logger.info(f'Load configuration file {self.config_path}')
+            return json.load(file)
@@ -0,0 +1,168 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import sys
+import json
+import socket
+import argparse
+import tempfile
+import socketserver
+
+from subdivx_dl import helper
+from subdivx_dl.translations.load_translations import get_language, get_translation, use_language
+
+DAEMON_POOL_SIZE = 16
+
+def get_socket_path():
+    user_id = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f'sdx-dl-{user_id}.sock')
+
+def is_daemon_supported():
+    return hasattr(socket, 'AF_UNIX')
+
+def get_forward_mode(args):
+    # Only non-interactive lookups can be answered by the daemon, a refresh
+    # runs here since the caches of the daemon outlive a single request
+    if args.refresh:
+        return None
+    if args.batch:
+        return 'batch' if args.batch != '-' else None
+    if args.scan:
+        return 'scan'
+    if args.fast and not args.season:
+        return 'fast'
+    return None
+
+def send_message(stream, message):
+    stream.write((json.dumps(message) + '\n').encode('utf-8'))
+    stream.flush()
+
+# -- Class DaemonRequestHandler -- #
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        from subdivx_dl.utils import Args, process_batch_item, resolve_batch, resolve_scan
+
+        request = json.loads(self.rfile.readline())
+        args = Args(argparse.Namespace(**request['args']))
+        mode = request['mode']
+
+        helper.logger.info(f'Daemon request [{mode}] with arguments: {args.get_args()}')
+
+        def on_progress(text):
+            send_message(self.wfile, {'progress': text})
+
+        server = self.server
+
+        # Messages are translated to the language of the client
+        with use_language(args.language_code):
+            try:
+                data_session = server.data_client.load_or_generate_data()
+
+                if mode == 'fast':
+                    reports = [process_batch_item(args, server.poolManager, server.url, data_session, args.SEARCH)]
+                elif mode == 'batch':
+                    reports = resolve_batch(args, server.poolManager, server.url, data_session, on_progress)
+                else:
+                    reports = resolve_scan(args, server.poolManager, server.url, data_session, on_progress)
+            except (SystemExit, Exception) as error:
+                helper.logger.error(f'Daemon request [{mode}] failed: {error!r}')
+                send_message(self.wfile, {'error': f'{get_translation("error_occurred")} {error!r}'})
+                return
+
+        send_message(self.wfile, {'reports': reports})
+
+def is_daemon_running(socket_path):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+def run_daemon(poolManager, url, data_client):
+    if not is_daemon_supported():
+        print(get_translation('daemon_not_supported'))
+        sys.exit(1)
+
+    socket_path = get_socket_path()
+
+    if is_daemon_running(socket_path):
+        print(get_translation('daemon_already_running'))
+        sys.exit(1)
+
+    # Remove the socket left behind by a daemon that did not exit cleanly
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    # Warm up guessit and the data session before accepting requests,
+    # parsing directly since a cached parse would not load its rules
+    from guessit import guessit
+    guessit('Warm Up 2000')
+    data_client.load_or_generate_data()
+
+    # Only the current user may connect to the socket
+    previous_umask = os.umask(0o077)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(socket_path, DaemonRequestHandler)
+    finally:
+        os.umask(previous_umask)
+
+    # Shared by every request handler thread
+    server.daemon_threads = True
+    server.poolManager = poolManager
+    server.url = url
+    server.data_client = data_client
+
+    print(f'{get_translation("daemon_listening")} {socket_path}')
+    helper.logger.info(f'Daemon listening on {socket_path}')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+        helper.logger.info('Daemon stopped')
+
+def forward_to_daemon(args):
+    mode = get_forward_mode(args)
+
+    if args.no_daemon or mode is None or not is_daemon_supported():
+        return None
+
+    # Paths and the language are resolved here, the daemon runs in another
+    # working directory and maybe with another locale
+    payload = dict(args.__dict__)
+    payload['language_code'] = get_language()
+    payload['location'] = os.path.abspath(args.location or os.getcwd())
+    for key in ('batch', 'scan'):
+        if payload[key]:
+            payload[key] = os.path.abspath(payload[key])
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(get_socket_path())
+    except OSError:
+        client.close()
+        return None
+
+    helper.logger.info(f'Forward [{mode}] request to daemon')
+
+    with client, client.makefile('rwb') as stream:
+        send_message(stream, {'mode': mode, 'args': payload})
+
+        for line in stream:
+            message = json.loads(line)
+            if 'progress' in message:
+                print(message['progress'])
+            elif 'reports' in message:
+                return message['reports']
+            elif 'error' in message:
+                print(message['error'])
+                sys.exit(1)
+
+    print(get_translation('daemon_connection_lost'))
+    helper.logger.error('Daemon closed the connection before replying')
+    sys.exit(1)
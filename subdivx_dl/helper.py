@@ -42,6 +42,20 @@ class DumpConfigAction(argparse.Action):
             print(get_translation('config_file_not_found_using_defaults'))
         sys.exit(0)
 
+# Dump mirror statistics
+class MirrorStatsAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        from subdivx_dl.mirrors import print_mirror_stats
+        print_mirror_stats()
+        sys.exit(0)
+
+# Dump session statistics
+class SessionStatsAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        from subdivx_dl.session import print_session_stats
+        print_session_stats()
+        sys.exit(0)
+
 # Check positive number
 def positive_number(value):
     try:
@@ -52,6 +66,29 @@ def positive_number(value):
         raise argparse.ArgumentTypeError(f'{value} should be greater than zero')
     return ivalue
 
+# Check non-negative number
+def non_negative_number(value):
+    try:
+        ivalue = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value} must be a numeric value')
+    if ivalue < 0:
+        raise argparse.ArgumentTypeError(f'{value} should not be negative')
+    return ivalue
+
+# Keys accepted by --sort
+SORT_KEYS = ('date', 'downloads', 'id', 'relevance', 'title', 'uploader')
+
+# Check sort keys
+def sort_keys(value):
+    keys = [key.strip().lower().lstrip('+') for key in value.split(',') if key.strip()]
+    if not keys:
+        raise argparse.ArgumentTypeError(f'{value} must name at least one sort key')
+    for key in keys:
+        if key.lstrip('-') not in SORT_KEYS:
+            raise argparse.ArgumentTypeError(f'{key} is not a sort key, use one of {", ".join(SORT_KEYS)}')
+    return ','.join(keys)
+
 # Parser for command-line
 parser = argparse.ArgumentParser(
     formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -61,8 +98,12 @@ parser = argparse.ArgumentParser(
             \rReport bugs or ask questions at <www.github.com/csq/subdivx-dl/issues>'''
 )
 
-# Parser main
-parser.add_argument('SEARCH', help='name of the TV series or movie to search for subtitles')
+# Parser main, a single search, a batch of searches, a directory scan or the daemon
+search_group = parser.add_mutually_exclusive_group(required=True)
+search_group.add_argument('SEARCH', help='name of the TV series or movie to search for subtitles', nargs='?')
+search_group.add_argument('-b', '--batch', help='download the best subtitle for each search in FILE (one per line, - for stdin)', metavar='FILE')
+search_group.add_argument('-sd', '--scan', help='download missing subtitles for every video found under DIR', metavar='DIR')
+search_group.add_argument('-D', '--daemon', help='run a resident server answering --fast, --batch and --scan requests', action='store_true')
 
 # Create a group for startup-related arguments
 startup_group = parser.add_argument_group('Startup').add_mutually_exclusive_group()
@@ -76,17 +117,54 @@ download_group.add_argument('-s', '--season', help='download subtitles for the e
 download_group.add_argument('-l', '--location', help='specify the destination directory')
 download_group.add_argument('-nr', '--no-rename', help='disable file renaming', action='store_true')
 download_group.add_argument('-f', '--fast', help='directly download the best matching subtitle', action='store_true')
+download_group.add_argument(
+    '-rm', '--race-mirrors',
+    help='download from N mirrors concurrently and keep the first valid archive (default: 9)',
+    type=positive_number,
+    nargs='?',
+    const=9,
+    metavar='N'
+)
+download_group.add_argument('-ed', '--extraction-depth', help='maximum depth of nested archives to extract (default: 2)', type=positive_number, metavar='N')
+
+# Create a group for batch-related arguments
+batch_group = parser.add_argument_group('Batch')
+batch_group.add_argument('-j', '--jobs', help='number of concurrent searches in batch and scan modes (default: 4)', type=positive_number)
+batch_group.add_argument('-br', '--batch-report', help='write the batch report as JSON to FILE', metavar='FILE')
 
 # Create a group for ordering-related arguments
 order_group = parser.add_argument_group('Order-by').add_mutually_exclusive_group()
 order_group.add_argument('-odates', '--order-by-dates', help='order results by dates', action='store_true')
 order_group.add_argument('-odownloads', '--order-by-downloads', help='order results by number of downloads', action='store_true')
+order_group.add_argument('-orelevance', '--order-by-relevance', help='order results by relevance to the search, also used by --fast', action='store_true')
+order_group.add_argument(
+    '-so', '--sort',
+    help=f'order results by comma separated KEYS, prefix a key with - to reverse it (keys: {", ".join(SORT_KEYS)})',
+    type=sort_keys,
+    metavar='KEYS'
+)
 
 # Create a group for results-related arguments
 results_group = parser.add_argument_group('Results')
 results_group.add_argument('-n', '--lines', help='limit the number of results', type=positive_number)
 results_group.add_argument('-c', '--comments', help='display comments', action='store_true')
 
+# Create a group for cache-related arguments
+cache_group = parser.add_argument_group('Cache')
+cache_mode_group = cache_group.add_mutually_exclusive_group()
+cache_mode_group.add_argument('-nc', '--no-cache', help='do not read or store cached search results and comments', action='store_true')
+cache_mode_group.add_argument('-rf', '--refresh', help='refresh cached search results and comments stored before this run', action='store_true')
+cache_group.add_argument('-ct', '--cache-ttl', help='minutes to keep cached search results (default: 60)', type=positive_number, metavar='MINUTES')
+cache_group.add_argument('-cct', '--comments-cache-ttl', help='minutes to keep cached comments (default: 30)', type=positive_number, metavar='MINUTES')
+cache_group.add_argument('-cs', '--cache-size', help='size limit in megabytes of each cache (default: 32)', type=positive_number, metavar='MB')
+cache_group.add_argument('-acs', '--archive-cache-size', help='size limit in megabytes of the downloaded archives cache (default: 256)', type=positive_number, metavar='MB')
+
+# Create a group for network-related arguments
+network_group = parser.add_argument_group('Network')
+network_group.add_argument('-mr', '--max-retries', help='retries of a failed request, 0 to disable (default: 5)', type=non_negative_number, metavar='N')
+network_group.add_argument('-rb', '--retry-backoff', help='base delay in milliseconds of the exponential backoff (default: 500)', type=positive_number, metavar='MS')
+network_group.add_argument('-cb', '--circuit-breaker', help='consecutive failures before an endpoint fails fast (default: 10, above --max-retries)', type=positive_number, metavar='N')
+
 # Create a group form layout-related arguments
 layout_group = parser.add_argument_group('Layout').add_mutually_exclusive_group()
 layout_group.add_argument('-m', '--minimal', help='use a minimal layout for results', action='store_true')
@@ -112,6 +190,10 @@ misc_group = parser.add_argument_group('Miscellaneous')
 misc_group.add_argument('-dh', '--disable-help', help='disable help messages', action='store_true')
 misc_group.add_argument('-ne', '--no-exit', help='disable automatic exit', action='store_true')
 misc_group.add_argument('-ns', '--new-session', help='create a new session', action='store_true')
+misc_group.add_argument('-ms', '--mirror-stats', help='dump download mirror statistics', action=MirrorStatsAction, nargs=0)
+misc_group.add_argument('-ss', '--session-stats', help='dump data session reuse statistics', action=SessionStatsAction, nargs=0)
+misc_group.add_argument('-nd', '--no-daemon', help='do not forward requests to a running daemon', action='store_true')
+misc_group.add_argument('-fl', '--frame-latency', help='log the latency of every drawn frame and print a summary at exit', action='store_true')
 misc_group.add_argument('-ua', '--user-agent', help='specify a custom user agent', type=str)
 misc_group.add_argument(
         '-lcode', '--language-code',
@@ -148,9 +230,12 @@ def configure_logger(level: str, format_str: str, save_to_file: bool) -> None:
 fullfmt = '[%(asctime)s] |%(levelname)s| %(message)s'
 compactfmt = '|%(levelname)s| %(message)s'
 
-args = parser.parse_args()
+def parse_args():
+    args = parser.parse_args()
+
+    if args.verbose:
+        configure_logger(level='info', format_str=compactfmt, save_to_file=False)
+    else:
+        configure_logger(level='info', format_str=fullfmt, save_to_file=True)
 
-if args.verbose:
-    configure_logger(level='info', format_str=compactfmt, save_to_file=False)
-else:
-    configure_logger(level='info', format_str=fullfmt, save_to_file=True)
+    return args
@@ -2,16 +2,18 @@
 # GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 import sys
-import urllib3
-import certifi
 
-from subdivx_dl.utils import *
+from subdivx_dl import helper
+from subdivx_dl.config import Args, Config
+from subdivx_dl.daemon import DAEMON_POOL_SIZE, forward_to_daemon, run_daemon
+from subdivx_dl.retry import RetryPolicy, set_retry_policy
+from subdivx_dl.terminal import install_renderer
 from subdivx_dl.translations.load_translations import get_translation, set_language
 
 SUBDIVX_URL = 'https://www.subdivx.com/'
 
 # Parse command-line arguments
-args = helper.parser.parse_args()
+args = helper.parse_args()
 
 # Load configuration
 config = Config().load_config() if args.load_config else {}
@@ -25,6 +27,28 @@ Config().save_config(args) if args.save_config else None
 
 helper.logger.info(f'Arguments used: {args.get_args()}')
 
+# Forward non-interactive lookups to a running daemon, before the search
+# and download helpers are imported
+forwarded_reports = forward_to_daemon(args) if not args.daemon else None
+
+if forwarded_reports is not None:
+    if args.batch or args.scan:
+        from subdivx_dl.utils import save_batch_report
+        save_batch_report(args, forwarded_reports)
+        sys.exit(0)
+
+    forwarded_error = forwarded_reports[0]['error']
+    print(forwarded_error or get_translation('done'))
+    sys.exit(1 if forwarded_error else 0)
+
+from subdivx_dl.utils import *
+
+# Retry policy shared by every request of this process
+set_retry_policy(RetryPolicy(args.max_retries, args.retry_backoff, args.circuit_breaker))
+
+# Parses of guessit shared by every search of this process
+set_guessit_store(args)
+
 # Default User-Agent: Firefox ESR latest version
 default_ua = 'Mozilla/5.0 (X11; Linux x86_64; rv:140.0) Gecko/20100101 Firefox/140.0'
 
@@ -32,33 +56,69 @@ headers = {
     'user-agent': default_ua if args.user_agent is None else args.user_agent
 }
 
+# Keep enough pooled connections for concurrent searches and downloads
+pool_size = (args.race_mirrors or 1) * ((args.jobs or BATCH_JOBS) if args.batch or args.scan else 1)
+
+# Leave room for the comments prefetch workers
+if args.comments:
+    pool_size = max(pool_size, COMMENTS_PREFETCH_WORKERS + 1)
+
+# The daemon serves several clients at once
+if args.daemon:
+    pool_size = max(pool_size, DAEMON_POOL_SIZE)
+
+# Imported here so informational and forwarded runs skip loading them
+import urllib3
+import certifi
+
 # Create a PoolManager instance for HTTPS requests
 https = urllib3.PoolManager(
     headers=headers,
     cert_reqs='CERT_REQUIRED',
     ca_certs=certifi.where(),
-    timeout=60,
-    retries=5
+    timeout=urllib3.Timeout(connect=10, read=60),
+    # Failed requests are retried by https_request, urllib3 only follows redirects
+    retries=urllib3.Retry(connect=0, read=0, other=0, status=0, redirect=5),
+    maxsize=pool_size
 )
 
 # Create a DataClient instance
 data_client = DataClient(https, headers, SUBDIVX_URL)
 
-# Delete data session if flag is set
-if args.new_session:
-	data_client.delete_data()
-
-# Load or generate data session
-if not data_client.has_data() or data_client.is_data_expired():
-    data_client.generate_data()
-    data_client.save_data()
-
-data_session = data_client.get_data_session()
+# Draw the interactive screens as frames on the terminal
+if not (args.daemon or args.batch or args.scan):
+    install_renderer(diff=not args.verbose, debug=args.frame_latency)
 
 # Parse user input
-SEARCH_TERM = parse_user_input(args.SEARCH)
+SEARCH_TERM = parse_user_input(args.SEARCH) if args.SEARCH is not None else None
 
 def main():
+    # Load or generate data session, deleting it first if flag is set
+    data_session = data_client.load_or_generate_data(new_session=args.new_session)
+
+    # A repeat --fast run reuses the subtitle picked before without searching,
+    # after the session so that a mirror download carries its cookie
+    if args.fast and SEARCH_TERM is not None:
+        resolved = get_resolved_subtitle(args, SEARCH_TERM)
+        if resolved is not None:
+            get_subtitle(args, https, SUBDIVX_URL, resolved['id_subtitle'])
+            sys.exit(0)
+
+    # Checking flag for switch to daemon mode
+    if args.daemon:
+        run_daemon(https, SUBDIVX_URL, data_client)
+        sys.exit(0)
+
+    # Checking flag for switch to batch mode
+    if args.batch:
+        run_batch(args, https, SUBDIVX_URL, data_session)
+        sys.exit(0)
+
+    # Checking flag for switch to scan mode
+    if args.scan:
+        run_scan(args, https, SUBDIVX_URL, data_session)
+        sys.exit(0)
+
     # Get all data from search
     search_data = get_data_page(args, https, SUBDIVX_URL, data_session, SEARCH_TERM)
 
@@ -67,16 +127,15 @@ def main():
 
     # Checking flag for switch to fast download mode
     if args.fast:
-        id_subtitle = get_best_match(args, search_data)
-        get_subtitle(args, https, SUBDIVX_URL, id_subtitle)
-        sys.exit(0)
+        id_subtitle, score = find_best_match(args, search_data)
 
-    # Size of the data
-    search_data_size = len(search_data)
+        # Only a pick that gave files is reused by later runs
+        if get_subtitle(args, https, SUBDIVX_URL, id_subtitle):
+            save_resolved_subtitle(args, SEARCH_TERM, id_subtitle, score)
+        sys.exit(0)
 
-    # Initialize cache for comments
-    if args.comments:
-        cache_comments = TTLCache(capacity=search_data_size, ttl=120)
+    # Prefetch comments of the visible rows into the shared cache
+    comments_prefetcher = CommentsPrefetcher(https, SUBDIVX_URL, get_comments_cache(args)) if args.comments else None
 
     # Reference to the original search data
     search_data_reference = search_data
@@ -120,6 +179,12 @@ def main():
         else:
             print_search_results(args, search_data)
 
+        if comments_prefetcher:
+            comments_prefetcher.prefetch([str(item.id_subtitle) for item in search_data])
+
+        # Size of the data, the rest of the rows are read once the page is shown
+        search_data_size = len(search_data_reference)
+
         # Get the user selection
         if search_data_size > block_size:
 
@@ -133,7 +198,7 @@ def main():
 
         try:
             selection = int(user_input) - 1
-            id_subtitle = str(search_data[selection]['id_subtitle'])
+            id_subtitle = str(search_data[selection].id_subtitle)
         except (ValueError, IndexError):
             if user_input.lower() == 'n':
                 if current_index >= search_data_size:
@@ -168,16 +233,10 @@ def main():
         comments_selection = None
 
         if args.comments:
-            comment_from_cache = cache_comments.get(id_subtitle)
-
-            if comment_from_cache and comment_from_cache != -1:
-                comments_selection = paginate_comments(args, comment_from_cache, block_size, selection, search_data)
-            else:
-                comment_list = get_comments(https, SUBDIVX_URL, id_subtitle)
-                cache_comments.put(id_subtitle, comment_list)
+            comment_list = comments_prefetcher.get(id_subtitle)
 
-                if comment_list:
-                    comments_selection = paginate_comments(args, comment_list, block_size, selection, search_data)
+            if comment_list:
+                comments_selection = paginate_comments(args, comment_list, block_size, selection, search_data)
 
         # Show selection menu
         user_input = prompt_user_selection(args, 'download') if comments_selection is None else comments_selection
@@ -0,0 +1,153 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import json
+import time
+import tempfile
+import threading
+
+from subdivx_dl import helper
+from subdivx_dl.storage import FileLock, write_json_atomic
+from subdivx_dl.translations.load_translations import get_translation
+
+# Mirrors are probed from sub9 down to sub1 unless stats say otherwise
+MIRROR_SERVERS = tuple(range(9, 0, -1))
+
+# -- Class MirrorStats -- #
+class MirrorStats():
+    _PATH_DATA = os.path.join(tempfile.gettempdir(), 'sdx-dl-mirrors.json')
+    _PATH_LOCK = os.path.join(tempfile.gettempdir(), 'sdx-dl-mirrors.lock')
+
+    # Recorded outcomes lose half of their weight every 6 hours
+    _HALF_LIFE = 6 * 60 * 60
+    _MAX_SAMPLES = 50
+
+    _OUTCOME_KEYS = {'success': 'successes', 'invalid': 'invalid', 'error': 'errors'}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = self._read_data()
+
+        # Outcomes recorded since the last save, merged into the file on save
+        self._pending = []
+
+    def _read_data(self):
+        try:
+            with open(self._PATH_DATA, 'r') as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _decay(self, entry, now):
+        factor = 0.5 ** (max(now - entry['updated'], 0) / self._HALF_LIFE)
+        return {key: entry[key] * factor for key in ('attempts', 'successes', 'invalid', 'errors')}
+
+    def _apply(self, stats, server, outcome, latency, now):
+        entry = stats.get(str(server), {
+            'attempts': 0, 'successes': 0, 'invalid': 0, 'errors': 0, 'latencies': [], 'updated': now
+        })
+        entry.update(self._decay(entry, now))
+
+        entry['attempts'] += 1
+        entry[self._OUTCOME_KEYS[outcome]] += 1
+        entry['latencies'] = (entry['latencies'] + [round(latency, 3)])[-self._MAX_SAMPLES:]
+        entry['updated'] = now
+
+        stats[str(server)] = entry
+
+    def record(self, server, outcome, latency):
+        now = time.time()
+
+        with self._lock:
+            self._apply(self._stats, server, outcome, latency, now)
+            self._pending.append((server, outcome, latency, now))
+
+    def save(self):
+        # Merge the pending outcomes into the file as written by other processes
+        try:
+            with self._lock, FileLock(self._PATH_LOCK):
+                if not self._pending:
+                    return
+
+                stats = self._read_data()
+                for server, outcome, latency, now in self._pending:
+                    self._apply(stats, server, outcome, latency, now)
+
+                write_json_atomic(self._PATH_DATA, stats)
+                self._stats = stats
+                self._pending = []
+        except OSError as error:
+            helper.logger.warning(f'Failed to save mirror stats: {error}')
+
+    def get_summary(self, server):
+        entry = self._stats.get(str(server))
+        if entry is None:
+            return None
+
+        counts = self._decay(entry, time.time())
+        attempts = counts['attempts']
+        latencies = sorted(entry['latencies'])
+
+        def percentile(q):
+            return latencies[round(q * (len(latencies) - 1))] if latencies else None
+
+        return {
+            'attempts': attempts,
+            'success_rate': counts['successes'] / attempts if attempts else None,
+            'invalid_rate': counts['invalid'] / attempts if attempts else None,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95)
+        }
+
+    def _sort_key(self, server):
+        entry = self._stats.get(str(server))
+        if entry is None:
+            return -0.5, 0
+
+        # Smoothed success rate, a mirror whose history has decayed returns to 0.5
+        counts = self._decay(entry, time.time())
+        success_score = (counts['successes'] + 1) / (counts['attempts'] + 2)
+
+        return -round(success_score, 2), self.get_summary(server)['p50'] or 0
+
+    def ordered_servers(self, servers):
+        return sorted(servers, key=self._sort_key)
+
+def print_mirror_stats():
+    from tabulate import tabulate
+
+    mirror_stats = MirrorStats()
+
+    def format_value(value, template):
+        return template.format(value) if value is not None else '-'
+
+    table = [[
+        get_translation('server'),
+        get_translation('attempts'),
+        get_translation('success_rate'),
+        get_translation('signature_failure_rate'),
+        'p50',
+        'p95'
+    ]]
+
+    for server in mirror_stats.ordered_servers(MIRROR_SERVERS):
+        summary = mirror_stats.get_summary(server)
+        if summary is None:
+            continue
+
+        table.append([
+            f'sub{server}',
+            f'{summary["attempts"]:.1f}',
+            format_value(summary['success_rate'], '{:.0%}'),
+            format_value(summary['invalid_rate'], '{:.0%}'),
+            format_value(summary['p50'], '{:.3f}s'),
+            format_value(summary['p95'], '{:.3f}s')
+        ])
+
+    if len(table) == 1:
+        print(get_translation('mirror_stats_not_found'))
+        return
+
+    print(f'{get_translation("mirror_stats_file")} {MirrorStats._PATH_DATA}\n')
+    print(tabulate(table, headers='firstrow', tablefmt='pretty', colalign=['center'] * 6))
@@ -0,0 +1,75 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import re
+import math
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Spellings that would otherwise split into tokens matching nothing
+TOKEN_REPLACEMENTS = (
+    ('blu-ray', 'bluray'),
+    ('web-dl', 'webdl'),
+    ('h.264', 'h264'),
+    ('h.265', 'h265')
+)
+
+def tokenize(text):
+    text = text.lower()
+    for old, new in TOKEN_REPLACEMENTS:
+        text = text.replace(old, new)
+    return TOKEN_PATTERN.findall(text)
+
+# -- Class BM25Index -- #
+class BM25Index():
+    def __init__(self, documents):
+        # Inverted index from each term to its (document, term frequency)
+        # postings, built in a single pass over the tokens of the documents
+        self.postings = {}
+        self.lengths = []
+
+        for index, document in enumerate(documents):
+            frequencies = {}
+            tokens = tokenize(document)
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+
+            for token, frequency in frequencies.items():
+                self.postings.setdefault(token, []).append((index, frequency))
+
+            self.lengths.append(len(tokens))
+
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+
+    def score(self, query):
+        # Returns the BM25 score of every document for the tokens of query
+        count = len(self.lengths)
+        scores = [0.0] * count
+
+        if not self.average_length:
+            return scores
+
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for index, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[index] / self.average_length)
+                scores[index] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        return scores
+
+def score_relevance(query, data):
+    # Returns the BM25 score of every item of data, in the same order
+    index = BM25Index(f'{item.title} {item.description}' for item in data)
+    return index.score(query)
+
+def rank_by_relevance(query, data):
+    # Returns (score, item) pairs from the most relevant, ties keep server order
+    scores = score_relevance(query, data)
+    return sorted(zip(scores, data), key=lambda pair: pair[0], reverse=True)
@@ -0,0 +1,79 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import json
+import time
+import tempfile
+import threading
+
+from subdivx_dl import helper
+from subdivx_dl.storage import FileLock, write_json_atomic
+
+# Requests per second and burst size of each kind of request
+RATE_LIMITS = {
+    'search': (2, 4),
+    'comments': (4, 8),
+    'downloads': (4, 9)
+}
+
+# -- Class RateLimiter -- #
+class RateLimiter():
+    # Token buckets shared by every thread and process of the user, the
+    # state file is only read and written while holding the lock file
+    _PATH_DATA = os.path.join(tempfile.gettempdir(), 'sdx-dl-ratelimit.json')
+    _PATH_LOCK = os.path.join(tempfile.gettempdir(), 'sdx-dl-ratelimit.lock')
+
+    def __init__(self, limits=RATE_LIMITS):
+        self.limits = limits
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self._PATH_DATA, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _update(self, kind, consume=0, pause=0):
+        # Refill the bucket, take tokens and return the seconds to wait for them
+        rate, burst = self.limits[kind]
+
+        with self._lock, FileLock(self._PATH_LOCK):
+            state = self._load()
+            now = time.time()
+
+            bucket = state.get(kind, {'tokens': burst, 'updated': now})
+            tokens = min(burst, bucket['tokens'] + (now - bucket['updated']) * rate)
+
+            # A paused bucket gets its next token once the pause is over
+            tokens = min(tokens, 1 - pause * rate) if pause else tokens - consume
+
+            state[kind] = {'tokens': tokens, 'updated': now}
+            write_json_atomic(self._PATH_DATA, state)
+
+        return max(0, -tokens / rate)
+
+    def acquire(self, kind):
+        # Tokens may go negative, a request reserves its slot and sleeps
+        # until then so waiting callers are served in arrival order
+        if kind not in self.limits:
+            return
+
+        delay = self._update(kind, consume=1)
+        if delay > 0:
+            helper.logger.info(f'Rate limit [{kind}] waiting {delay:.2f} s')
+            time.sleep(delay)
+
+    def pause(self, kind, seconds):
+        # Throttle every process after the server reported too many requests
+        if kind not in self.limits or seconds <= 0:
+            return
+
+        self._update(kind, pause=seconds)
+        helper.logger.warning(f'Rate limit [{kind}] paused for {seconds:.2f} s')
+
+rate_limiter = RateLimiter()
+
+def get_rate_limiter():
+    return rate_limiter
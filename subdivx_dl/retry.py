@@ -0,0 +1,132 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import re
+import time
+import random
+import threading
+
+from urllib.parse import urlsplit
+
+from subdivx_dl import helper
+
+# Statuses worth another attempt, any other error status fails at once
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+MAX_RETRIES = 5
+RETRY_BACKOFF = 500
+RETRY_MAX_DELAY = 30
+BREAKER_THRESHOLD = 10
+BREAKER_COOLDOWN = 60
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def get_endpoint(method, url):
+    # Subtitle ids and query strings do not make a different endpoint
+    parts = urlsplit(url)
+    path = re.sub(r'/\d+$', '', parts.path)
+    return f'{method} {parts.netloc}{path}'
+
+# -- Class CircuitOpenError -- #
+class CircuitOpenError(Exception):
+    # Raised instead of sending a request to an endpoint whose circuit is open
+    def __init__(self, endpoint):
+        super().__init__(f'Circuit open for {endpoint}, request not sent')
+        self.endpoint = endpoint
+
+# -- Class RequestCancelledError -- #
+class RequestCancelledError(Exception):
+    # Raised instead of another attempt once the caller no longer needs the response
+    def __init__(self, url):
+        super().__init__(f'Request to {url} cancelled')
+        self.url = url
+
+# -- Class CircuitBreaker -- #
+class CircuitBreaker():
+    def __init__(self, threshold, cooldown):
+        # An endpoint opens after threshold consecutive failures and rejects
+        # requests until cooldown seconds later, when a single trial may pass
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened = {}
+
+    def allow(self, endpoint):
+        with self._lock:
+            opened_at = self._opened.get(endpoint)
+            if opened_at is None:
+                return True
+
+            if time.monotonic() - opened_at < self.cooldown:
+                return False
+
+            # Half open, the other requests keep failing fast during the trial
+            self._opened[endpoint] = time.monotonic()
+            helper.logger.info(f'Circuit half open for {endpoint}')
+            return True
+
+    def record_success(self, endpoint):
+        with self._lock:
+            if self._opened.pop(endpoint, None) is not None:
+                helper.logger.info(f'Circuit closed for {endpoint}')
+            self._failures.pop(endpoint, None)
+
+    def record_failure(self, endpoint):
+        with self._lock:
+            failures = self._failures[endpoint] = self._failures.get(endpoint, 0) + 1
+            if failures < self.threshold:
+                return False
+
+            self._opened[endpoint] = time.monotonic()
+            helper.logger.warning(f'Circuit open for {endpoint} after {failures} consecutive failures')
+            return True
+
+# -- Class RetryPolicy -- #
+class RetryPolicy():
+    def __init__(self, max_retries=None, backoff=None, breaker_threshold=None,
+                 max_delay=RETRY_MAX_DELAY, breaker_cooldown=BREAKER_COOLDOWN):
+        # backoff is the base delay in milliseconds, doubled on every attempt
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = (RETRY_BACKOFF if backoff is None else backoff) / 1000
+        self.max_delay = max_delay
+
+        # By default the attempts of a single request never open the circuit alone
+        if breaker_threshold is None:
+            breaker_threshold = max(BREAKER_THRESHOLD, self.max_retries + 2)
+
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+
+    def is_retryable(self, status):
+        return status in RETRY_STATUSES
+
+    def get_delay(self, attempt, retry_after=None):
+        # Returns None when the server asks to wait longer than allowed
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_delay, self.backoff * 2 ** attempt))
+
+retry_policy = RetryPolicy()
+
+def get_retry_policy():
+    return retry_policy
+
+def set_retry_policy(policy):
+    global retry_policy
+    retry_policy = policy
@@ -0,0 +1,54 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import json
+import tempfile
+
+from subdivx_dl import helper
+from subdivx_dl.storage import write_json_atomic
+from subdivx_dl.translations.load_translations import get_translation
+
+# -- Class SessionStats -- #
+class SessionStats():
+    _PATH_DATA = os.path.join(tempfile.gettempdir(), 'sdx-dl-session-stats.json')
+
+    # reused: valid session found, regenerated: new token requested,
+    # waited: blocked while another process was regenerating
+    _KEYS = ('reused', 'regenerated', 'waited')
+
+    def __init__(self):
+        self._stats = self._read_data()
+
+    def _read_data(self):
+        try:
+            with open(self._PATH_DATA, 'r') as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def increment(self, key):
+        self._stats[key] = self._stats.get(key, 0) + 1
+
+    def get(self, key):
+        return self._stats.get(key, 0)
+
+    def save(self):
+        try:
+            write_json_atomic(self._PATH_DATA, self._stats)
+        except OSError as error:
+            helper.logger.warning(f'Failed to save session stats: {error}')
+
+def print_session_stats():
+    from tabulate import tabulate
+
+    session_stats = SessionStats()
+
+    if not any(session_stats.get(key) for key in SessionStats._KEYS):
+        print(get_translation('session_stats_not_found'))
+        return
+
+    table = [[get_translation(f'session_{key}'), session_stats.get(key)] for key in SessionStats._KEYS]
+
+    print(f'{get_translation("session_stats_file")} {SessionStats._PATH_DATA}\n')
+    print(tabulate(table, tablefmt='pretty', colalign=['left', 'right']))
@@ -0,0 +1,80 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import json
+import time
+import tempfile
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+# -- Class FileLock -- #
+class FileLock():
+    # Exclusive lock shared between processes through a lock file,
+    # not reentrant: each instance must be acquired only once at a time
+    _POLL_INTERVAL = 0.05
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def _try_lock(self):
+        try:
+            if os.name == 'nt':
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def acquire(self, blocking=True):
+        self._file = open(self.path, 'a+')
+        self._file.seek(0)
+
+        while not self._try_lock():
+            if not blocking:
+                self._file.close()
+                self._file = None
+                return False
+            time.sleep(self._POLL_INTERVAL)
+
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+
+        try:
+            if os.name == 'nt':
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+def write_json_atomic(path, data):
+    # Write to a unique temporary file and rename so readers never see partial
+    # data, threads of one process may write the same path at the same time
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or None, suffix='.tmp')
+
+    try:
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(data, file, indent=4)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,193 @@
+# Copyright: (c) 2022, subdivx-dl
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+import sys
+import time
+import atexit
+import shutil
+
+from subdivx_dl import helper
+from subdivx_dl.translations.load_translations import get_translation
+
+CURSOR_HOME = '\x1b[H'
+CLEAR_SCREEN = '\x1b[2J'
+CLEAR_LINE_END = '\x1b[K'
+CLEAR_SCREEN_END = '\x1b[J'
+
+# Rows below a frame taken by the selection prompt and the echoed input,
+# a frame that would scroll them off the screen is always fully redrawn
+PROMPT_ROWS = 3
+
+def enable_ansi():
+    # Windows 10 consoles process escape sequences once virtual terminal
+    # processing is turned on, older ones fall back to cls
+    if os.name != 'nt':
+        return os.environ.get('TERM') != 'dumb'
+
+    try:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)
+        mode = ctypes.c_uint32()
+
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+# -- Class FrameStream -- #
+class FrameStream():
+    # Stands in for sys.stdout so everything printed during a frame reaches
+    # the renderer, the rest (fileno, isatty, encoding) is the real stream
+    def __init__(self, renderer, stream):
+        self._renderer = renderer
+        self._stream = stream
+
+    def write(self, text):
+        return self._renderer.write(text)
+
+    def flush(self):
+        self._renderer.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+# -- Class Renderer -- #
+class Renderer():
+    def __init__(self, stream, diff=True, debug=False):
+        # A frame starts on clear() and is drawn with a single write when
+        # stdout is flushed, which input() does before prompting. Only the
+        # lines that differ from the screen are rewritten
+        self.stream = stream
+        self.diff = diff
+        self.debug = debug
+        self._frame = None
+        self._dirty = False
+        self._screen = None
+        self._size = None
+        self._started = None
+        self._latencies = []
+        self._redrawn = 0
+        self._total = 0
+
+    def begin_frame(self):
+        # Text of an unflushed frame is replaced without ever being drawn
+        self._frame = []
+        self._dirty = True
+        self._started = time.perf_counter()
+
+    def write(self, text):
+        if self._frame is None:
+            # Output outside frames leaves the screen unknown
+            self._screen = None
+            return self.stream.write(text)
+
+        self._frame.append(text)
+        self._dirty = True
+        return len(text)
+
+    def flush(self):
+        if not self._dirty:
+            self.stream.flush()
+            return
+
+        # Later writes extend the same frame and redraw only what they add
+        text = ''.join(self._frame)
+        self._frame = [text]
+        self._dirty = False
+
+        output, redrawn, total = self._render(text)
+        self.stream.write(output)
+        self.stream.flush()
+
+        if self._started is not None:
+            self._record(time.perf_counter() - self._started, redrawn, total, len(output))
+            self._started = None
+
+    def _render(self, text):
+        columns, rows = shutil.get_terminal_size()
+        lines = text.split('\n')
+
+        # Wrapped or scrolled lines would not stay on the rows they are diffed against
+        fits = len(lines) + PROMPT_ROWS <= rows and all(len(line) <= columns for line in lines)
+
+        if not self.diff or not fits or self._screen is None or self._size != (columns, rows):
+            self._screen = lines if fits else None
+            self._size = (columns, rows)
+            return CURSOR_HOME + CLEAR_SCREEN + text, len(lines), len(lines)
+
+        parts = []
+        for row, line in enumerate(lines):
+            if row >= len(self._screen) or self._screen[row] != line:
+                parts.append(f'\x1b[{row + 1};1H{line}{CLEAR_LINE_END}')
+
+        # Leave the cursor where the frame ends and wipe the previous prompt below it
+        parts.append(f'\x1b[{len(lines)};{len(lines[-1]) + 1}H{CLEAR_SCREEN_END}')
+
+        self._screen = lines
+        return ''.join(parts), len(parts) - 1, len(lines)
+
+    def _record(self, latency, redrawn, total, size):
+        self._latencies.append(latency)
+        self._redrawn += redrawn
+        self._total += total
+
+        if self.debug:
+            helper.logger.info(
+                f'Frame {len(self._latencies)} rendered in {latency * 1000:.2f} ms, '
+                f'{redrawn} of {total} lines redrawn, {size} bytes written'
+            )
+
+    def print_stats(self):
+        if not self._latencies:
+            return
+
+        import statistics
+        from tabulate import tabulate
+
+        latencies = sorted(latency * 1000 for latency in self._latencies)
+        table = [
+            [get_translation('frames_rendered'), len(latencies)],
+            [get_translation('frame_latency_median'), f'{statistics.median(latencies):.2f} ms'],
+            [get_translation('frame_latency_max'), f'{latencies[-1]:.2f} ms'],
+            [get_translation('frame_lines_redrawn'), f'{self._redrawn}/{self._total}']
+        ]
+
+        print(tabulate(table, tablefmt='pretty', colalign=['left', 'right']))
+
+renderer = None
+
+def get_renderer():
+    return renderer
+
+def install_renderer(diff=True, debug=False):
+    # Frames are only drawn with escape sequences on a terminal that handles them
+    global renderer
+
+    if not sys.stdout.isatty() or not enable_ansi():
+        return None
+
+    renderer = Renderer(sys.stdout, diff=diff, debug=debug)
+    sys.stdout = FrameStream(renderer, renderer.stream)
+    atexit.register(uninstall_renderer)
+
+    return renderer
+
+def uninstall_renderer():
+    # Draw the last frame and give stdout back before the interpreter exits
+    global renderer
+
+    if renderer is None:
+        return
+
+    sys.stdout.flush()
+    sys.stdout = renderer.stream
+
+    if renderer.debug:
+        renderer.print_stats()
+
+    renderer = None
@@ -4,12 +4,17 @@
 import os
 import json
 import locale
-import importlib.resources
+import threading
 
-# Load translations
-with importlib.resources.path(__package__, 'translations.json') as path:
-    with open(path, 'r', encoding='utf-8') as file:
-        translations = json.load(file)
+from contextlib import contextmanager
+
+DEFAULT_LANGUAGE = 'en'
+
+# Each language lives in its own file and is loaded on first use
+translations = {}
+
+# Language of the request served by the current thread, see use_language
+_request_language = threading.local()
 
 # Get the current language code
 try:
@@ -17,16 +22,40 @@ try:
     if locale_code:
         language_code = locale.normalize(locale_code).split('_')[0][:2]
     else:
-        language_code = 'en'
+        language_code = DEFAULT_LANGUAGE
 except (AttributeError, IndexError, ValueError):
-    language_code = 'en'
+    language_code = DEFAULT_LANGUAGE
+
+def load_language(code):
+    if code not in translations:
+        path = os.path.join(os.path.dirname(__file__), f'{code}.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                translations[code] = json.load(file)
+        except FileNotFoundError:
+            translations[code] = None
+    return translations[code]
+
+def get_language():
+    return getattr(_request_language, 'code', None) or language_code
 
 def get_translation(key):
-    try:
-        return translations[language_code].get(key)
-    except KeyError:
-        return translations['en'].get(key)
+    language = load_language(get_language())
+    if language is None or key not in language:
+        language = load_language(DEFAULT_LANGUAGE)
+    return language.get(key)
 
 def set_language(code):
     global language_code
     language_code = code
+
+@contextmanager
+def use_language(code):
+    # Translate in code only on this thread, the daemon serves clients of
+    # different languages at once. None keeps the language of the process
+    previous = getattr(_request_language, 'code', None)
+    _request_language.code = code
+    try:
+        yield
+    finally:
+        _request_language.code = previous
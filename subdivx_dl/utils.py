@@ -4,27 +4,81 @@
 import os
 import re
 import sys
+import atexit
+import copy
 import json
+import codecs
+import hashlib
+import io
+import queue
 import time
 import shutil
 import tempfile
 import textwrap
-import patoolib
+import threading
 
-from urllib3.exceptions import MaxRetryError, TimeoutError
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from tempfile import NamedTemporaryFile
-from tabulate import tabulate, SEPARATING_LINE
-from guessit import guessit
+from urllib3.exceptions import HTTPError
 from subdivx_dl import helper
-from subdivx_dl.translations.load_translations import get_translation
+from subdivx_dl.archives import ExtractionStats, extract_members, list_archive
+from subdivx_dl.cache import ArchiveCache, GuessitCache, SQLiteCache
+from subdivx_dl.config import Args, Config
+from subdivx_dl.mirrors import MIRROR_SERVERS, MirrorStats
+from subdivx_dl.ranking import rank_by_relevance, score_relevance
+from subdivx_dl.ratelimit import get_rate_limiter
+from subdivx_dl.retry import CircuitOpenError, RequestCancelledError, get_endpoint, get_retry_policy, parse_retry_after
+from subdivx_dl.session import SessionStats
+from subdivx_dl.storage import FileLock, write_json_atomic
+from subdivx_dl.terminal import get_renderer
+from subdivx_dl.translations.load_translations import get_translation, use_language
 
 SUBTITLE_EXTENSIONS = ('.srt', '.sub', '.ass', '.ssa', '.idx')
 
 COMPRESSED_EXTENSIONS = ('.zip', '.rar', '.7z')
 
+VIDEO_EXTENSIONS = ('.mkv', '.mp4', '.avi', '.m4v', '.mov', '.wmv', '.mpg', '.mpeg', '.ts', '.webm')
+
 DEFAULT_STYLE = 'pretty'
 
+# Heavy dependencies are imported on first use to keep startup fast
+def tabulate(*args, **kwargs):
+    from tabulate import tabulate
+    return tabulate(*args, **kwargs)
+
+def guessit(string):
+    # Parses are memoized in memory and on disk, see GuessitCache
+    return guessit_cache.parse(string)
+
+SEARCH_CACHE_TTL = 60 * 60
+
+SEARCH_CACHE_FORMAT = 2
+
+COMMENTS_CACHE_TTL = 30 * 60
+
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+COMMENTS_PREFETCH_WORKERS = 4
+
+BATCH_JOBS = 4
+
+EXTRACTION_DEPTH = 2
+
+SEARCH_CHUNK_SIZE = 64 * 1024
+
+ARCHIVE_CACHE_TTL = 30 * 24 * 60 * 60
+
+ARCHIVE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+GUESSIT_CACHE_TTL = 90 * 24 * 60 * 60
+
+GUESSIT_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# Parses are only kept in memory until set_guessit_store is called
+guessit_cache = GuessitCache()
+
 def get_terminal_size():
     try:
         terminal_size = shutil.get_terminal_size()
@@ -32,50 +86,366 @@ def get_terminal_size():
     except OSError:
         return 80, 25
 
-def get_file_extension(file_path):
-    with open(file_path, 'rb') as file:
-        header = file.read(4)
+FILE_SIGNATURES = {
+    b'\x50\x4B\x03\x04': '.zip',
+    b'\x52\x61\x72\x21': '.rar',
+    b'\x37\x7A\xBC\xAF': '.7z'
+}
 
-    file_signatures = {
-        b'\x50\x4B\x03\x04': '.zip',
-        b'\x52\x61\x72\x21': '.rar',
-        b'\x37\x7A\xBC\xAF': '.7z'
-    }
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
-    for signature, extension in file_signatures.items():
+def get_signature_extension(header):
+    for signature, extension in FILE_SIGNATURES.items():
         if header.startswith(signature):
             return extension
 
     return '.bin' # For unknown file
 
-def download_file(poolManager, url, id_subtitle, location):
-    helper.logger.info(f'Downloading archive from: {url}{id_subtitle} in {location}')
+def discard_response(response):
+    # Keep the connection alive when the rest of the body is small, otherwise drop it
+    remaining = response.length_remaining
+    if remaining is not None and remaining <= DOWNLOAD_CHUNK_SIZE:
+        response.drain_conn()
+    else:
+        response.close()
+    response.release_conn()
 
-    with NamedTemporaryFile(dir=location, delete=False) as temp_file:
-        for i in range(9, 0, -1):
-            server_address = f'{url}sub{i}/{id_subtitle}'
-            helper.logger.info(f'Attempt on server N°{i} with url {server_address}')
+def sniff_archive(response, server):
+    first_chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+    file_extension = get_signature_extension(first_chunk)
 
-            response = https_request(poolManager, 'GET', server_address)
+    if file_extension == '.bin':
+        helper.logger.info(f'Server N°{server} returned an invalid archive')
+        discard_response(response)
+        return None
 
-            temp_file.write(response.data)
-            temp_file.seek(0)
+    return response, first_chunk, file_extension
 
-            file_extension = get_file_extension(temp_file.name)
+def fetch_from_mirror(poolManager, url, id_subtitle, server, mirror_stats, stop=None):
+    # Each mirror is an endpoint of the retry policy and of its circuit breaker,
+    # a race sets stop once a winner is found and the other mirrors give up
+    server_address = f'{url}sub{server}/{id_subtitle}'
+    helper.logger.info(f'Attempt on server N°{server} with url {server_address}')
 
-            if file_extension != '.bin':
-                helper.logger.info('Download complete')
-                temp_file.close()
+    from urllib3.exceptions import HTTPError
 
-                temp_file_new_name = f'{temp_file.name}{file_extension}'
-                os.rename(temp_file.name, temp_file_new_name)
-                break
-            elif i == 1:
-                print(get_traslation('no_subtitles_downloaded_broken_link'))
-                helper.logger.error(f'Subtitles not downloaded, link broken: {url}{id_subtitle}')
-                sys.exit(1)
+    response = None
+    start_time = time.perf_counter()
+    try:
+        response = send_request(
+            poolManager, 'GET', server_address, limit='downloads', stop=stop, preload_content=False
+        )
+
+        # A response arriving after the race is decided is never read
+        if stop is not None and stop.is_set():
+            discard_response(response)
+            raise RequestCancelledError(server_address)
+
+        result = sniff_archive(response, server)
+    except (CircuitOpenError, RequestCancelledError) as error:
+        helper.logger.info(f'Skipping server N°{server}: {error}')
+        return None
+    except HTTPError as error:
+        # Also a connection lost or timed out while reading the first chunk
+        helper.logger.warning(f'Server N°{server} failed: {error}')
+        mirror_stats.record(server, 'error', time.perf_counter() - start_time)
+        if response is not None:
+            response.close()
+            response.release_conn()
+        return None
+
+    mirror_stats.record(server, 'success' if result else 'invalid', time.perf_counter() - start_time)
+
+    return result
+
+def close_mirror_future(future):
+    if future.cancelled() or future.exception() is not None:
+        return
+
+    result = future.result()
+    if result is not None:
+        discard_response(result[0])
+
+def download_sequential(poolManager, url, id_subtitle, servers, mirror_stats):
+    for server in servers:
+        result = fetch_from_mirror(poolManager, url, id_subtitle, server, mirror_stats)
+
+        if result is not None:
+            return result
+
+    return None
+
+def download_race(poolManager, url, id_subtitle, servers, mirror_stats, max_concurrent):
+    # At most max_concurrent mirrors are in flight, the rest wait in the queue
+    executor = ThreadPoolExecutor(max_workers=min(max_concurrent, len(servers)))
+    stop = threading.Event()
+    futures = {
+        executor.submit(fetch_from_mirror, poolManager, url, id_subtitle, server, mirror_stats, stop): server
+        for server in servers
+    }
+
+    # Stats are saved once the last mirror, late or cancelled, is done
+    pending = [len(futures)]
+    pending_lock = threading.Lock()
+
+    def save_when_done(future):
+        with pending_lock:
+            pending[0] -= 1
+            if pending[0]:
+                return
+        mirror_stats.save()
+
+    winner = None
+    try:
+        for future in as_completed(futures):
+            if future.result() is not None:
+                winner = future
+                helper.logger.info(f'Server N°{futures[future]} won the race')
+                return future.result()
+    finally:
+        # Stop the running mirrors before their next attempt, drop the queued
+        # ones and close the responses of late finishers
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in futures:
+            if future is not winner:
+                future.add_done_callback(close_mirror_future)
+            future.add_done_callback(save_when_done)
+
+    return None
+
+def download_archive(poolManager, url, id_subtitle, max_concurrent=None, quiet=False):
+    # A quiet download raises its failures instead of reporting them and exiting
+    helper.logger.info(f'Downloading archive from: {url}{id_subtitle}')
+
+    # Probe mirrors best-first according to their recorded health
+    mirror_stats = MirrorStats()
+    servers = mirror_stats.ordered_servers(MIRROR_SERVERS)
+    helper.logger.info(f'Mirror order: {servers}')
+
+    if max_concurrent and max_concurrent > 1:
+        helper.logger.info(f'Racing mirrors with up to {max_concurrent} concurrent requests')
+        result = download_race(poolManager, url, id_subtitle, servers, mirror_stats, max_concurrent)
+    else:
+        result = download_sequential(poolManager, url, id_subtitle, servers, mirror_stats)
+        mirror_stats.save()
+
+    if result is None and quiet:
+        raise Exception(get_translation('no_subtitles_downloaded_broken_link'))
+
+    if result is None:
+        print(get_translation('no_subtitles_downloaded_broken_link'))
+        helper.logger.error(f'Subtitles not downloaded, link broken: {url}{id_subtitle}')
+        sys.exit(1)
+
+    return result
+
+def stream_archive(response, first_chunk, write, quiet=False):
+    from urllib3.exceptions import ProtocolError, TimeoutError
+
+    # Pass the archive to write in fixed-size chunks
+    try:
+        write(first_chunk)
+        for chunk in response.stream(DOWNLOAD_CHUNK_SIZE):
+            write(chunk)
+    except (ProtocolError, TimeoutError):
+        if quiet:
+            raise
+        print(get_translation('connection_error_check_connection'))
+        helper.logger.error('Connection lost while downloading archive')
+        sys.exit(1)
+    finally:
+        response.release_conn()
+
+    helper.logger.info('Download complete')
+
+def save_archive(response, first_chunk, file_extension, location, quiet=False):
+    # Returns the path of the archive and its SHA-256, hashed while it is written
+    digest = hashlib.sha256()
+
+    def write(chunk):
+        digest.update(chunk)
+        temp_file.write(chunk)
+
+    with NamedTemporaryFile(dir=location, suffix=file_extension, delete=False) as temp_file:
+        stream_archive(response, first_chunk, write, quiet)
+
+    return temp_file.name, digest.hexdigest()
+
+def download_file(poolManager, url, id_subtitle, location, max_concurrent=None, archive_cache=None, quiet=False):
+    # Returns the archive as a zip in memory or as the path of a file,
+    # looking in the local archive cache before any mirror
+    cached = archive_cache.get(id_subtitle) if archive_cache else None
+    if cached is not None:
+        file_extension, path = cached
+        helper.logger.info(f'Loaded archive from cache for subtitle [{id_subtitle}]')
+        return path
+
+    response, first_chunk, file_extension = download_archive(poolManager, url, id_subtitle, max_concurrent, quiet)
+
+    # Zip archives are extracted in memory, the rest from disk without ever
+    # being read whole
+    if file_extension == '.zip':
+        source = io.BytesIO()
+        stream_archive(response, first_chunk, source.write, quiet)
+        if archive_cache:
+            archive_cache.put(id_subtitle, file_extension, source.getbuffer())
+    else:
+        source, digest = save_archive(response, first_chunk, file_extension, location, quiet)
+        if archive_cache:
+            archive_cache.put_file(id_subtitle, file_extension, source, digest)
+
+    return source
+
+def is_wanted_member(member_name, extract_nested=True):
+    # Only subtitles and the archives that may hold them are worth extracting
+    parts = member_name.replace('\\', '/').split('/')
+    if '__MACOSX' in parts:
+        return False
+
+    extension = os.path.splitext(parts[-1])[1].lower()
+    return extension in SUBTITLE_EXTENSIONS or (extract_nested and extension in COMPRESSED_EXTENSIONS)
+
+def extract_zip(buffer, dest_dir, stats, extract_nested=True):
+    # Subtitles are written straight from memory, nested archives are returned
+    # as buffers (zip) or as files left in dest_dir (rar, 7z) for patool
+    import zipfile
+
+    helper.logger.info('Unpacking zip archive with zipfile')
+
+    nested_archives = []
+    extracted, skipped = [], []
+
+    with zipfile.ZipFile(buffer) as archive:
+        for member in archive.infolist():
+            if member.is_dir():
+                continue
+
+            if not is_wanted_member(member.filename, extract_nested):
+                skipped.append(member.file_size)
+                continue
+
+            extracted.append(member.file_size)
+            name, extension = os.path.splitext(os.path.basename(member.filename))
+            extension = extension.lower()
+
+            if extension in SUBTITLE_EXTENSIONS:
+                with archive.open(member) as source, open(os.path.join(dest_dir, name + extension), 'wb') as target:
+                    shutil.copyfileobj(source, target, DOWNLOAD_CHUNK_SIZE)
+            elif extension == '.zip':
+                nested_archives.append(io.BytesIO(archive.read(member)))
+            else:
+                with archive.open(member) as source, NamedTemporaryFile(dir=dest_dir, suffix=extension, delete=False) as target:
+                    shutil.copyfileobj(source, target, DOWNLOAD_CHUNK_SIZE)
+                nested_archives.append(target.name)
+
+    stats.record(extracted, skipped)
+    helper.logger.info(f'Extracted {len(extracted)} members, skipped {len(skipped)} members ({sum(skipped)} bytes)')
+
+    return nested_archives
+
+def extract_archive(archive, dest_dir, stats, extract_nested=True, quiet=False):
+    # List the archive first and extract only the wanted members, patool
+    # extracts everything when no installed program can list the archive
+    listing = list_archive(archive)
+
+    if listing is None:
+        uncompress(archive, dest_dir, quiet)
+        return
+
+    members, tool, extract_command = listing
+    wanted_names = []
+    extracted, skipped = [], []
+
+    for member in members:
+        if member['is_dir']:
+            continue
+
+        if is_wanted_member(member['name'], extract_nested):
+            wanted_names.append(member['name'])
+            extracted.append(member['size'])
+        else:
+            skipped.append(member['size'])
+
+    stats.record(extracted, skipped)
+    helper.logger.info(
+        f'Unpacking {len(extracted)} members of [{os.path.basename(archive)}] with {os.path.basename(tool)}, '
+        f'skipped {len(skipped)} members ({sum(skipped)} bytes)'
+    )
+
+    if wanted_names and not extract_members(archive, tool, extract_command, wanted_names, dest_dir):
+        helper.logger.warning(f'{os.path.basename(tool)} failed to unpack [{os.path.basename(archive)}]')
+        uncompress(archive, dest_dir, quiet)
+
+def collect_extracted_files(directory, dest_dir):
+    # One traversal of an extracted tree, subtitles are flattened into dest_dir
+    # with a lower-case extension and nested archives are returned
+    nested_archives = []
+    pending_dirs = [directory]
+
+    while pending_dirs:
+        with os.scandir(pending_dirs.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != '__MACOSX':
+                        pending_dirs.append(entry.path)
+                    continue
+
+                name, extension = os.path.splitext(entry.name)
+                extension = extension.lower()
+
+                if extension in SUBTITLE_EXTENSIONS:
+                    os.replace(entry.path, os.path.join(dest_dir, name + extension))
+                elif extension in COMPRESSED_EXTENSIONS:
+                    nested_archives.append(entry.path)
+
+    return nested_archives
+
+def extract_subtitles(source, dest_dir, max_depth=EXTRACTION_DEPTH, quiet=False):
+    # Archives are extracted breadth-first from a queue, those found inside
+    # an archive are queued one level deeper until max_depth is reached.
+    # source is a zip in memory or the path of an archive on disk, returns
+    # the ExtractionStats of every archive extracted
+    import zipfile
+
+    stats = ExtractionStats()
+    pending_archives = deque([(source, 1)])
+
+    while pending_archives:
+        source, depth = pending_archives.popleft()
+        extract_nested = depth < max_depth
+
+        in_memory = isinstance(source, io.BytesIO)
+
+        # zipfile reads zips in memory or on disk without spawning a process
+        if in_memory or source.lower().endswith('.zip'):
+            try:
+                nested_archives = extract_zip(source, dest_dir, stats, extract_nested)
+                pending_archives.extend((archive, depth + 1) for archive in nested_archives)
+                continue
+            except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as error:
+                # Unsupported compression or encryption, let the external programs try
+                helper.logger.warning(f'Failed to unpack zip archive with zipfile: {error}')
+
+            if in_memory:
+                with NamedTemporaryFile(dir=dest_dir, suffix='.zip', delete=False) as temp_file:
+                    temp_file.write(source.getbuffer())
+                source = temp_file.name
+
+        extract_dir = tempfile.mkdtemp(prefix='extract-', dir=dest_dir)
+        extract_archive(source, extract_dir, stats, extract_nested, quiet)
+
+        nested_archives = collect_extracted_files(extract_dir, dest_dir)
+        if extract_nested:
+            pending_archives.extend((archive, depth + 1) for archive in nested_archives)
+        elif nested_archives:
+            helper.logger.info(f'Skip {len(nested_archives)} archives nested deeper than {max_depth}')
+
+    return stats
+
+def uncompress(compressed_path, dest_dir, quiet=False):
+    import patoolib
 
-def uncompress(compressed_path, dest_dir):
     try:
         helper.logger.info(f'Unpacking [{os.path.basename(compressed_path)}]')
         patoolib.extract_archive(
@@ -86,22 +456,11 @@ def uncompress(compressed_path, dest_dir):
         )
     except patoolib.util.PatoolError as e:
         helper.logger.error('Failed to unpack file')
+        if quiet:
+            raise Exception(f'{get_translation("failed_to_unpack_file")} {e}') from e
         print(f'{get_translation("failed_to_unpack_file")} {e}')
         sys.exit(1)
 
-def move_all_to_parent_directory(directory):
-    for root, dirs, files in os.walk(directory, topdown=True):
-        for dir_ in dirs:
-            if dir_ != '__MACOSX':
-                subdirectory = os.path.join(root, dir_)
-                for _, _, filenames in os.walk(subdirectory, topdown=True):
-                    for filename in filenames:
-                        file_path = os.path.join(subdirectory, filename)
-                        ext = os.path.splitext(filename)[1].lower()
-                        if ext in SUBTITLE_EXTENSIONS:
-                            dest_path = os.path.join(directory, filename)
-                            os.rename(file_path, dest_path)
-
 def get_attribute_weights():
     attribute_weights = {
         'edition': 0.4,        # 40% importance
@@ -115,35 +474,26 @@ def get_attribute_weights():
 
     return attribute_weights
 
+def normalize_description(description):
+    return description.replace('Blu-Ray', 'BluRay').lower().replace('director\'s', 'directors')
+
 def select_best_subtitle_from_list(args, data):
     helper.logger.info('Selecting the best subtitle from the list')
 
-    key_values = GuessitInfo(args.SEARCH).get_info()
-    normalized_key_values = normalize_key_values(key_values)
-
-    weights = get_attribute_weights()
+    key_values = guessit(args.SEARCH)
+    matcher = AttributeMatcher(normalize_key_values(key_values), get_attribute_weights())
 
     file_name = data[1][1]
 
     max_score = 0
     for i in range(1, len(data)):
         subtitle_name = data[i][1].strip().lower()
-
-        score = 0
-        for key in weights.keys():
-            try:
-                attribute = normalized_key_values[key].lower()
-
-                if attribute in subtitle_name:
-                    score += weights[key]
-                    helper.logger.info(f'Found attribute [{key}] in subtitle [{i}]')
-            except KeyError:
-                pass
+        score = matcher.score(subtitle_name)
 
         if max_score < score:
             max_score = score
             file_name = data[i][1]
-            helper.logger.info(f'New best match with score {max_score:.2f} in subtitle [{i}]')
+            helper.logger.info(f'New best match with score {max_score:.2f} in subtitle [{i}] with attributes {matcher.match(subtitle_name)}')
 
     helper.logger.info(f'The best matching subtitle has been selected with a score {max_score:.2f}')
     return file_name
@@ -204,24 +554,29 @@ def print_menu_content_dir(args, directory):
         # Return the file_name of the subtitle
         return file_names[0]
 
-def rename_subtitle_file(source_file_path, dest_file_path):
+def rename_subtitle_file(source_file_path, dest_file_path, quiet=False):
     try:
         # Create destination directory if not exists
         os.makedirs(os.path.dirname(dest_file_path), exist_ok=True)
 
         # Move the file
         shutil.move(source_file_path, dest_file_path)
+        return dest_file_path
     except (PermissionError, FileExistsError) as error:
         helper.logger.warning(f'Permissions issues on destination directory: {error}')
+        if quiet:
+            raise
         print(f'{get_translation("error_occurred")} {error}')
         sys.exit(0)
 
-def rename_and_move_subtitle(args, source_dir, dest_dir):
+def rename_and_move_subtitle(args, source_dir, dest_dir, quiet=False):
     subtitle_files = [
         file for file in os.listdir(source_dir)
         if file.endswith(SUBTITLE_EXTENSIONS)
     ]
 
+    moved_files = []
+
     for source_file in subtitle_files:
         extension = os.path.splitext(source_file)[1]
         num_subtitles = len(subtitle_files)
@@ -233,7 +588,7 @@ def rename_and_move_subtitle(args, source_dir, dest_dir):
                 dest_file_path = os.path.join(dest_dir, selected_subtitle)
 
                 helper.logger.info(f'Move [{selected_subtitle}] to {dest_dir} as [{selected_subtitle}]')
-                rename_subtitle_file(source_file_path, dest_file_path)
+                moved_files.append(rename_subtitle_file(source_file_path, dest_file_path, quiet))
                 break
             elif num_subtitles == 1:
                 dest_file = source_file
@@ -265,7 +620,7 @@ def rename_and_move_subtitle(args, source_dir, dest_dir):
                 dest_file_path = os.path.join(dest_dir, dest_file.replace(extension, subtitle_extension))
 
                 helper.logger.info(f'Move [{selected_subtitle}] to {dest_dir} as [{dest_file}]')
-                rename_subtitle_file(source_file_path, dest_file_path)
+                moved_files.append(rename_subtitle_file(source_file_path, dest_file_path, quiet))
                 break
 
         # Find IMDb code in search term
@@ -279,26 +634,111 @@ def rename_and_move_subtitle(args, source_dir, dest_dir):
         dest_file_path = os.path.join(dest_dir, dest_file)
 
         helper.logger.info(f'Move [{source_file}] to {dest_dir} as [{dest_file}]')
-        rename_subtitle_file(source_file_path, dest_file_path)
+        moved_files.append(rename_subtitle_file(source_file_path, dest_file_path, quiet))
+
+    return moved_files
+
+def get_cache(args, namespace, ttl_minutes, default_ttl):
+    if args.no_cache:
+        return None
+
+    ttl = ttl_minutes * 60 if ttl_minutes else default_ttl
+    max_bytes = args.cache_size * 1024 * 1024 if args.cache_size else CACHE_MAX_BYTES
+
+    return SQLiteCache(namespace, ttl, max_bytes, refresh=args.refresh)
+
+def set_guessit_store(args):
+    # Parses are stored on disk unless the caches are disabled
+    if args.no_cache:
+        return
+
+    guessit_cache.store = SQLiteCache('guessit', GUESSIT_CACHE_TTL, GUESSIT_CACHE_MAX_BYTES)
+    atexit.register(guessit_cache.flush)
+
+def get_search_cache(args):
+    return get_cache(args, 'search', args.cache_ttl, SEARCH_CACHE_TTL)
+
+def get_comments_cache(args):
+    return get_cache(args, 'comments', args.comments_cache_ttl, COMMENTS_CACHE_TTL)
+
+def get_resolved_cache(args):
+    # Subtitles picked by --fast for a search, shares the search results TTL
+    return get_cache(args, 'resolved', args.cache_ttl, SEARCH_CACHE_TTL)
 
-def rename_file_extension(directory):
-    for filename in os.listdir(directory):
-        # Split filename into name and extension
-        name, ext = os.path.splitext(filename)
+def get_resolved_key(args, search):
+    # The pick depends on the order of the results
+    order = ','.join(f'-{key}' if descending else key for key, descending in get_sort_keys(args)) or 'server'
 
-        # Check if the file has a subtitle extension
-        if ext.lower() in SUBTITLE_EXTENSIONS:
-            # If the extension is upper-case, rename the file to lower-case
-            if ext.isupper():
-                new_filename = f'{name}{ext.lower()}'
-                os.rename(os.path.join(directory, filename), os.path.join(directory, new_filename))
+    return f'{order}:{search}'
+
+def get_resolved_subtitle(args, search):
+    resolved_cache = get_resolved_cache(args)
+    resolved = resolved_cache.get(get_resolved_key(args, search)) if resolved_cache else None
+
+    if resolved is not None:
+        helper.logger.info(f'Loaded resolved subtitle [{resolved["id_subtitle"]}] from cache for search: {search}')
+
+    return resolved
+
+def save_resolved_subtitle(args, search, id_subtitle, score):
+    resolved_cache = get_resolved_cache(args)
+    if resolved_cache:
+        resolved_cache.put(get_resolved_key(args, search), {'id_subtitle': id_subtitle, 'score': score})
+
+def get_archive_cache(args):
+    if args.no_cache:
+        return None
+
+    # Archives are far larger than the other entries and have their own limit
+    max_bytes = args.archive_cache_size * 1024 * 1024 if args.archive_cache_size else ARCHIVE_CACHE_MAX_BYTES
+
+    return ArchiveCache(ARCHIVE_CACHE_TTL, max_bytes, refresh=args.refresh)
 
 def get_data_page(args, poolManager, url, data_session, search):
     clear()
-    print(get_translation('searching'), end='\r')
+    print(get_translation('searching'), end='\r', flush=True)
+
+    search_results = search_subtitles(args, poolManager, url, data_session, search)
+
+    if not search_results:
+        if not args.verbose:
+            print(get_translation('no_subtitles_found'))
+        sys.exit(0)
 
+    return search_results
+
+def search_subtitles(args, poolManager, url, data_session, search, quiet=False):
     query = parse_search_query(search)
 
+    # Results are cached per normalized query, web version and row format
+    cache_key = f'{SEARCH_CACHE_FORMAT}:{data_session["web_version"]}:{query}'
+    search_cache = get_search_cache(args)
+
+    search_results = search_cache.get(cache_key) if search_cache else None
+
+    if search_results is not None:
+        search_results = [SearchResult.from_dict(result) for result in search_results]
+        helper.logger.info(f'Loaded search results from cache for query: {query}')
+    else:
+        search_results = request_data_page(poolManager, url, data_session, search, query, quiet)
+
+        # Cached once the last row has been read from the response
+        if search_cache:
+            def save_results(rows):
+                if rows:
+                    search_cache.put(cache_key, [row.to_dict() for row in rows])
+
+            search_results.on_complete = save_results
+
+    if not search_results:
+        helper.logger.info(f'No subtitles found for query: {query}')
+        return search_results
+
+    helper.logger.info(f'Found subtitles for query: {query}')
+    return search_results
+
+def request_data_page(poolManager, url, data_session, search, query, quiet=False):
+    # A quiet search raises its failures, also those found reading the rows
     payload = {
         'tabla': 'resultados',
         'filtros': '',
@@ -307,58 +747,151 @@ def get_data_page(args, poolManager, url, data_session, search):
     }
 
     helper.logger.info(f'Starting request to subdivx.com with search: {search} parsed as: {query}')
-    response = https_request(poolManager, 'POST', url=f'{url}inc/ajax.php', fields=payload)
+    request = send_request if quiet else https_request
+    response = request(
+        poolManager, 'POST', url=f'{url}inc/ajax.php', limit='search', fields=payload, preload_content=False
+    )
+
+    return SearchResults(iter_search_results(response, quiet))
+
+def iter_json_array(chunks, key):
+    # Yields the items of the array under key of a JSON object while the
+    # chunks of the document arrive, only the pending text is kept in memory
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    start = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+
+    chunks = iter(chunks)
+    buffer = ''
+    index = None
+    exhausted = False
+
+    while True:
+        if index is None:
+            match = start.search(buffer)
+            if match is not None:
+                index = match.end()
+                continue
+        else:
+            while index < len(buffer) and buffer[index] in ' \t\r\n,':
+                index += 1
+
+            if index < len(buffer):
+                if buffer[index] == ']':
+                    return
+
+                try:
+                    item, index = decoder.raw_decode(buffer, index)
+                except json.JSONDecodeError:
+                    # An item cut by the end of the chunk, unless nothing is left
+                    if exhausted:
+                        raise
+                else:
+                    yield item
+
+                    # Drop the parsed text so the buffer stays around one chunk
+                    if index >= SEARCH_CHUNK_SIZE:
+                        buffer, index = buffer[index:], 0
+                    continue
+
+        if exhausted:
+            raise json.JSONDecodeError(f'Missing or unterminated array {key}', buffer, index or 0)
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer += text_decoder.decode(b'', final=True)
+        else:
+            buffer += text_decoder.decode(chunk)
+
+def iter_search_results(response, quiet=False):
+    from urllib3.exceptions import HTTPError
 
     try:
-        data = json.loads(response.data).get('aaData')
-    except json.JSONDecodeError:
+        for result in iter_json_array(response.stream(SEARCH_CHUNK_SIZE), 'aaData'):
+            yield SearchResult(
+                result['id'],
+                result['titulo'],
+                result['descripcion'],
+                result['descargas'],
+                result['nick'],
+                parse_date(result['fecha_subida'])
+            )
+    except json.JSONDecodeError as error:
         helper.logger.error('Failed to decode JSON due to an expired data session')
+        if quiet:
+            raise Exception(get_translation('expired_data_session_try_again')) from error
         print(get_translation('expired_data_session_try_again'))
         DataClient().delete_data()
         sys.exit(1)
+    except HTTPError as error:
+        helper.logger.error(f'Connection error while reading the search results: {error}')
+        if quiet:
+            raise
+        print(get_translation('connection_error_check_connection'))
+        sys.exit(1)
+    finally:
+        response.release_conn()
+
+def get_sort_keys(args):
+    # (key, descending) pairs of the requested order, the --order-by flags
+    # are shorthands for a single descending key
+    if args.sort:
+        keys = args.sort
+    elif args.order_by_relevance:
+        keys = '-relevance'
+    elif args.order_by_downloads:
+        keys = '-downloads'
+    elif args.order_by_dates:
+        keys = '-date'
+    else:
+        return []
+
+    return [(key.lstrip('-'), key.startswith('-')) for key in keys.split(',')]
+
+def reverse_text(text):
+    # Orders like text in reverse, a prefix goes after the longer texts
+    return tuple(-ord(char) for char in text) + (1,)
+
+# Sort values of a row by key, relevance is scored for all rows at once
+SORT_VALUES = {
+    'date': lambda row: row.upload_ordinal,
+    'downloads': lambda row: int(row.downloads or 0),
+    'id': lambda row: int(row.id_subtitle),
+    'title': lambda row: row.title.casefold(),
+    'uploader': lambda row: (row.uploader or '').casefold()
+}
+
+def get_sort_column(args, key, descending, rows):
+    if key == 'relevance':
+        values = score_relevance(args.SEARCH, rows)
+    else:
+        values = [SORT_VALUES[key](row) for row in rows]
 
-    search_results = []
-
-    for result in data:
-        subtitle = {
-            'id_subtitle': result['id'],
-            'title': filter_text(result['titulo']),
-            'description': filter_text(result['descripcion']),
-            'downloads': result['descargas'],
-            'uploader': result['nick'],
-            'upload_date': parse_date(result['fecha_subida']) if result['fecha_subida'] else '-'
-        }
-        search_results.append(subtitle)
-
-    if not search_results:
-        if not args.verbose:
-            print(get_translation('no_subtitles_found'))
-        helper.logger.info(f'No subtitles found for query: {query}')
-        sys.exit(0)
+    if not descending:
+        return values
 
-    helper.logger.info(f'Found subtitles for query: {query}')
-    return search_results
+    return [reverse_text(value) if isinstance(value, str) else -value for value in values]
 
 def sort_data(args, data):
-    if args.order_by_downloads:
-        return sorted(data, key=lambda item: item['downloads'], reverse=True)
-    elif args.order_by_dates:
-        return sorted(
-            data,
-            key=lambda item: (
-                datetime.strptime(item['upload_date'], '%d/%m/%Y'
-                if item['upload_date'] != '-' else '-')
-            ),
-            reverse=True
-        )
-    else:
+    sort_keys = get_sort_keys(args)
+    if not sort_keys:
         return data
 
+    # Every key is computed once per row and the rows are sorted in a single
+    # stable pass, ties keep the server order
+    rows = list(data)
+    columns = [get_sort_column(args, key, descending, rows) for key, descending in sort_keys]
+    keys = columns[0] if len(columns) == 1 else list(zip(*columns))
+
+    return [rows[index] for index in sorted(range(len(rows)), key=keys.__getitem__)]
+
 def parse_date(date):
+    # Days since 0001-01-01 of a server date, 0 when it is missing or invalid
     try:
-        return datetime.strptime(date, '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y')
-    except ValueError:
-        return None
+        return datetime(int(date[0:4]), int(date[5:7]), int(date[8:10])).toordinal()
+    except (TypeError, ValueError):
+        return 0
 
 def parse_user_input(input):
     search = input.strip()
@@ -370,7 +903,7 @@ def parse_user_input(input):
 
 def parse_search_query(search):
     try:
-        result = GuessitInfo(search).get_info()
+        result = guessit(search)
         file_type = result['type']
         title = result['title'].replace(':', '')
         year = result.get('year', '')
@@ -390,19 +923,34 @@ def parse_search_query(search):
 
     return query
 
-def get_comments(poolManager, url, subtitle_id):
+def get_comments(poolManager, url, subtitle_id, comments_cache=None, quiet=False):
+    # Comments are served from the shared cache first, a quiet request raises
+    # its failure instead of reporting it and exiting
+    if comments_cache:
+        comments = comments_cache.get(str(subtitle_id))
+        if comments is not None:
+            helper.logger.info(f'Loaded comments from cache for subtitle [{subtitle_id}]')
+            return comments
+
     payload = {
         'getComentarios': subtitle_id
     }
 
-    response = https_request(poolManager, 'POST', url=f'{url}inc/ajax.php', fields=payload)
+    request = send_request if quiet else https_request
+    response = request(poolManager, 'POST', url=f'{url}inc/ajax.php', limit='comments', fields=payload)
     comments_data = json.loads(response.data).get('aaData', [])
 
-    comments = [filter_text(comment['comentario']) for comment in comments_data]
+    # Sanitized when a page of comments is printed
+    comments = [comment['comentario'] for comment in comments_data]
+
+    if comments_cache:
+        comments_cache.put(str(subtitle_id), comments)
 
     return comments
 
 def print_search_results(args, search_data):
+    from tabulate import SEPARATING_LINE
+
     terminal_width, _ = get_terminal_size()
 
     maxcolwidths = []
@@ -445,20 +993,20 @@ def print_search_results(args, search_data):
         if args.alternative:
             table_data.append([
                 index,
-                item['title'],
-                item['description']
+                item.title,
+                item.description
             ][:len(columns)])
 
             if index < len(search_data) and (not args.style.endswith('grid') if args.style else True):
                 table_data.append(SEPARATING_LINE)
         else:
-            title = shorten_text(item['title'], terminal_width - min_width)
+            title = shorten_text(item.title, terminal_width - min_width)
             table_data.append([
                 index,
                 title,
-                item['downloads'],
-                item['upload_date'],
-                item.get('uploader', '')
+                item.downloads,
+                item.upload_date,
+                item.uploader
             ][:len(columns)])
 
     # Print the centered table
@@ -507,8 +1055,8 @@ def print_search_results_compact(args, search_data):
 
     for index, item in enumerate(search_data, start=1):
 
-        table_data.append([index, item['title'].center(terminal_width - 12)])
-        table_data.append([None, item['description']])
+        table_data.append([index, item.title.center(terminal_width - 12)])
+        table_data.append([None, item.description])
 
         styles = ['presto', 'simple', 'pipe', 'orgtbl']
 
@@ -525,15 +1073,15 @@ def print_search_results_compact(args, search_data):
 def print_centered(args, text, end=None):
     terminal_width, _ = get_terminal_size()
 
+    lines = text.splitlines()
+
     if args.style in ['simple', 'presto']:
-        first_line_length = len(text.splitlines()[1])
+        first_line_length = len(lines[1])
     else:
-        first_line_length = len(text.splitlines()[0])
-
-    padding_width = (terminal_width - first_line_length) // 2
+        first_line_length = len(lines[0])
 
-    centered_lines = [' ' * padding_width + line for line in text.splitlines()]
-    centered_text = '\n'.join(centered_lines)
+    padding = ' ' * ((terminal_width - first_line_length) // 2)
+    centered_text = '\n'.join(padding + line for line in lines)
 
     print('\n' + centered_text, end=end)
 
@@ -551,33 +1099,48 @@ def print_center_text(text):
     padding = '\n' * ((terminal_height // 2) - 5)
 
     clear()
-    print(padding + text.center(terminal_width))
+    print(padding + text.center(terminal_width), flush=True)
     time.sleep(0.8)
 
-def filter_text(text):
-    # Remove HTML tags from the text
-    text = re.sub(r'<[^>]+>', '', text)
+# Everything filter_text rewrites, matched in a single pass: runs of spaces
+# together with the HTML tags removed between them, \´, escaped quotes and
+# the &amp; and &quot; entities. Every branch starts with a literal so the
+# regex engine skips quickly to the next candidate
+SANITIZE_PATTERN = re.compile(
+    r' (?: *(?:<[^>]+> *)+| +)|<[^>]+> *(?:<[^>]+> *)*|\\(?:´|\\{0,2}(?:"|&(?:amp;)?quot;))|&(?:amp;(?:quot;)?|quot;)'
+)
 
-    # Replace multiple consecutive spaces with a single space
-    text = re.sub(r'(?<=\S) {2,}(?=\S)', ' ', text)
+SANITIZE_NEEDLES = ('<', '\\', '&', '  ')
 
-    # Replace &amp; with &
-    text = text.replace('&amp;', '&')
+# Replacements of the matches starting with & or \, any other one is a quote
+SANITIZE_REPLACEMENTS = {'&amp;': '&', '\\´': ''}
 
-    # Replace &quot; with "
-    text = text.replace('&quot;', '"')
+def sanitize_match(match):
+    text = match.group()
 
-    # Replace \" or \\\" with "
-    text = re.sub(r'\\{1,3}"', '"', text)
+    if text[0] in '&\\':
+        return SANITIZE_REPLACEMENTS.get(text, '"')
 
-    # Remove \´
-    text = text.replace('\´', '')
+    # Removed tags leave their surrounding spaces, collapsed only between words
+    spaces = sum(part.partition('<')[0].count(' ') for part in text.split('>')) if '<' in text else len(text)
+    start, end = match.span()
+    string = match.string
 
-    return text
+    if spaces > 1 and start > 0 and end < len(string) and not string[start - 1].isspace() and not string[end].isspace():
+        return ' '
+
+    return ' ' * spaces
+
+def filter_text(text):
+    # Most titles and descriptions are plain text and skip the regex entirely
+    if not any(needle in text for needle in SANITIZE_NEEDLES):
+        return text
+
+    return SANITIZE_PATTERN.sub(sanitize_match, text)
 
 def print_description(args, selection, search_data):
     terminal_width, _ = get_terminal_size()
-    description = search_data[selection]['description'].strip()
+    description = search_data[selection].description.strip()
 
     description_text = get_translation('description').center(terminal_width - 8)
     description_table = [[description_text], [description]]
@@ -601,7 +1164,7 @@ def print_summary(args, selection, search_data):
     attributes = ['title', 'downloads', 'upload_date', 'uploader']
     for attribute in attributes:
         attribute_text = get_translation(attribute)
-        summary.append([attribute_text.capitalize(), search_data[selection][attribute]])
+        summary.append([attribute_text.capitalize(), getattr(search_data[selection], attribute)])
 
     print_centered(
         args,
@@ -616,48 +1179,287 @@ def print_summary(args, selection, search_data):
 
 def get_subtitle(args, poolManager, url, id_subtitle):
     if not args.verbose:
-        print(get_translation('working'), end='\r')
+        print(get_translation('working'), end='\r', flush=True)
+
+    moved_files, stats = download_subtitle(args, poolManager, url, id_subtitle)
+
+    if not args.verbose:
+        clear()
+        print(get_translation('done'))
+
+        if stats.skipped_members:
+            print(format_skipped(stats.skipped_members, stats.skipped_bytes))
+
+    return moved_files
 
+def download_subtitle(args, poolManager, url, id_subtitle, quiet=False):
+    # Returns the moved files and the stats of the extraction. Batch and scan
+    # workers download quietly, failures are raised to their report
     # Create temporal directory
     with tempfile.TemporaryDirectory() as temp_dir:
         helper.logger.info(f'Create temporal directory {temp_dir}')
 
-        # Download file compressed in temporal directory
-        download_file(poolManager, url, id_subtitle, temp_dir)
+        source = download_file(
+            poolManager, url, id_subtitle, temp_dir, args.race_mirrors, get_archive_cache(args), quiet
+        )
 
-        # Extract files, including nested archives, up to depth 2
-        excluded_file_names = set()
+        stats = extract_subtitles(source, temp_dir, args.extraction_depth or EXTRACTION_DEPTH, quiet)
+        helper.logger.info(f'Extraction stats: {stats.get_summary()}')
 
-        max_extraction_depth = 2
+        # Get destination directory
+        dest_dir = args.location or os.getcwd()
 
-        while max_extraction_depth > 0:
-            for file_name in os.listdir(temp_dir):
-                file_path = os.path.join(temp_dir, file_name)
+        # Rename and/or move subtitles
+        moved_files = rename_and_move_subtitle(args, temp_dir, dest_dir, quiet)
 
-                if file_name.endswith(COMPRESSED_EXTENSIONS) and file_name not in excluded_file_names:
-                    uncompress(file_path, temp_dir)
-                    excluded_file_names.add(file_name)
+    helper.logger.info(f'Delete temporal directory {temp_dir}')
 
-            max_extraction_depth -= 1
+    return moved_files, stats
 
-        # Move all files from any subdirectories to the parent directory
-        move_all_to_parent_directory(temp_dir)
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            break
+        size /= 1024
+    return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
 
-        # Rename file extension if necessary
-        rename_file_extension(temp_dir)
+def format_skipped(members, size):
+    return f'{get_translation("skipped_archive_members")} {members} ({format_bytes(size)})'
 
-        # Get destination directory
-        dest_dir = args.location or os.getcwd()
+def read_batch_terms(path):
+    try:
+        if path == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(path, 'r', encoding='utf-8') as file:
+                lines = file.read().splitlines()
+    except OSError as error:
+        print(f'{get_translation("error_occurred")} {error}')
+        helper.logger.error(f'Failed to read batch file: {error}')
+        sys.exit(1)
 
-        # Rename and/or move subtitles
-        rename_and_move_subtitle(args, temp_dir, dest_dir)
+    # One search per line, blank lines and comments are skipped
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
 
-    # Message for user
-    helper.logger.info(f'Delete temporal directory {temp_dir}')
+def new_batch_report(search):
+    return {
+        'search': search, 'id_subtitle': None, 'score': None, 'files': [], 'error': None,
+        'skipped_members': 0, 'skipped_bytes': 0
+    }
 
-    if not args.verbose:
-        clear()
-        print(get_translation('done'))
+def describe_batch_error(error):
+    # Workers request quietly, an exit left in a helper is still only reported
+    if isinstance(error, SystemExit):
+        return f'{get_translation("aborted_with_exit_code")} {error.code}'
+    return str(error)
+
+def process_batch_item(args, poolManager, url, data_session, search, location=None, search_data=None):
+    item_args = copy.copy(args)
+    item_args.SEARCH = search
+    item_args.fast = True
+    item_args.location = location or args.location
+
+    report = new_batch_report(search)
+
+    try:
+        # Scan groups bring their own results, a single search may be resolved already
+        resolved = get_resolved_subtitle(item_args, search) if search_data is None else None
+
+        if resolved is not None:
+            report['id_subtitle'], report['score'] = resolved['id_subtitle'], resolved['score']
+        else:
+            if search_data is None:
+                search_data = search_subtitles(item_args, poolManager, url, data_session, search, quiet=True)
+
+            if not search_data:
+                report['error'] = get_translation('no_subtitles_found')
+                return report
+
+            search_data = sort_data(item_args, search_data)
+            report['id_subtitle'], report['score'] = find_best_match(item_args, search_data)
+
+        report['files'], stats = download_subtitle(item_args, poolManager, url, report['id_subtitle'], quiet=True)
+        report['skipped_members'], report['skipped_bytes'] = stats.skipped_members, stats.skipped_bytes
+
+        # Only a pick that gave files is reused by later runs
+        if report['files'] and resolved is None:
+            save_resolved_subtitle(item_args, search, report['id_subtitle'], report['score'])
+    except (SystemExit, Exception) as error:
+        report['error'] = describe_batch_error(error)
+
+    if report['error']:
+        helper.logger.error(f'Batch item [{search}] failed: {report["error"]}')
+
+    return report
+
+def call_in_language(language_code, function, *args):
+    # Worker threads do not inherit the language of the request they serve
+    with use_language(language_code):
+        return function(*args)
+
+def run_batch(args, poolManager, url, data_session):
+    reports = resolve_batch(args, poolManager, url, data_session)
+    save_batch_report(args, reports)
+
+    return reports
+
+def resolve_batch(args, poolManager, url, data_session, on_progress=print):
+    search_terms = read_batch_terms(args.batch)
+    workers = args.jobs or BATCH_JOBS
+
+    helper.logger.info(f'Batch of {len(search_terms)} searches with {workers} workers')
+
+    reports = [None] * len(search_terms)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                call_in_language, args.language_code, process_batch_item, args, poolManager, url, data_session, search
+            ): index
+            for index, search in enumerate(search_terms)
+        }
+
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            reports[index] = future.result()
+            on_progress(format_batch_progress(completed, len(search_terms), search_terms[index], [reports[index]]))
+
+    return reports
+
+def find_videos_without_subtitles(directory):
+    videos = []
+    pending_dirs = [directory]
+
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        video_entries = []
+        subtitle_names = []
+
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending_dirs.append(entry.path)
+                    elif entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                        video_entries.append(entry)
+                    elif entry.name.lower().endswith(SUBTITLE_EXTENSIONS):
+                        subtitle_names.append(entry.name)
+        except OSError as error:
+            helper.logger.warning(f'Skipping directory {current_dir}: {error}')
+            continue
+
+        # A video is covered by a sibling subtitle of the same base name (e.g. name.srt,
+        # name.es.srt), a longer name (name 2.srt for name.mkv) belongs to another video
+        for entry in video_entries:
+            base_name = os.path.splitext(entry.name)[0]
+            if any(
+                os.path.splitext(name)[0] == base_name or name.startswith(base_name + '.')
+                for name in subtitle_names
+            ):
+                helper.logger.info(f'Skipping [{entry.path}], subtitle already exists')
+            else:
+                videos.append(entry.path)
+
+    return sorted(videos)
+
+def process_scan_group(args, poolManager, url, data_session, videos):
+    try:
+        search_data = search_subtitles(args, poolManager, url, data_session, os.path.basename(videos[0]), quiet=True)
+        error = None if search_data else get_translation('no_subtitles_found')
+    except (SystemExit, Exception) as exception:
+        search_data, error = None, describe_batch_error(exception)
+
+    reports = []
+
+    for video in videos:
+        search = os.path.basename(video)
+
+        if error:
+            report = new_batch_report(search)
+            report['error'] = error
+            reports.append(report)
+            continue
+
+        # Name each subtitle after its video and write it next to it
+        reports.append(process_batch_item(
+            args, poolManager, url, data_session, search, location=os.path.dirname(video), search_data=search_data
+        ))
+
+    return reports
+
+def run_scan(args, poolManager, url, data_session):
+    reports = resolve_scan(args, poolManager, url, data_session)
+    save_batch_report(args, reports)
+
+    return reports
+
+def resolve_scan(args, poolManager, url, data_session, on_progress=print):
+    videos = find_videos_without_subtitles(args.scan)
+    workers = args.jobs or BATCH_JOBS
+
+    # Videos resolving to the same query share a single search
+    query_groups = {}
+    for video in videos:
+        query = parse_search_query(os.path.basename(video))
+        query_groups.setdefault(query, []).append(video)
+
+    helper.logger.info(f'Scan found {len(videos)} videos without subtitles in {len(query_groups)} queries')
+
+    reports = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                call_in_language, args.language_code, process_scan_group, args, poolManager, url, data_session, group
+            ): query
+            for query, group in query_groups.items()
+        }
+
+        for completed, future in enumerate(as_completed(futures), start=1):
+            group_reports = future.result()
+            reports.extend(group_reports)
+            on_progress(format_batch_progress(completed, len(query_groups), futures[future], group_reports))
+
+    return reports
+
+def format_batch_progress(completed, total, search, reports):
+    failed = any(report['error'] for report in reports)
+    status = get_translation('error') if failed else get_translation('done')
+    return f'[{completed}/{total}] {search}: {status}'
+
+def save_batch_report(args, reports):
+    print_batch_report(args, reports)
+
+    if args.batch_report:
+        with open(args.batch_report, 'w', encoding='utf-8') as file:
+            json.dump(reports, file, indent=4, ensure_ascii=False)
+        helper.logger.info(f'Save batch report {args.batch_report}')
+
+def print_batch_report(args, reports):
+    table = [[
+        'N°',
+        get_translation('search'),
+        'ID',
+        get_translation('score'),
+        get_translation('file_name'),
+        get_translation('error')
+    ]]
+
+    for index, report in enumerate(reports, start=1):
+        table.append([
+            index,
+            report['search'],
+            report['id_subtitle'] or '-',
+            f'{report["score"]:.2f}' if report['score'] is not None else '-',
+            '\n'.join(os.path.basename(file) for file in report['files']) or '-',
+            report['error'] or '-'
+        ])
+
+    print('\n' + tabulate(table, headers='firstrow', tablefmt=args.style or DEFAULT_STYLE, stralign='left'))
+
+    skipped_members = sum(report.get('skipped_members', 0) for report in reports)
+    if skipped_members:
+        print(format_skipped(skipped_members, sum(report.get('skipped_bytes', 0) for report in reports)))
 
 def normalize_key_values(key_values):
     source = key_values.get('source')
@@ -682,10 +1484,39 @@ def normalize_key_values(key_values):
 
     return key_values
 
-def get_best_match(args, search_data):
+# -- Class AttributeMatcher -- #
+class AttributeMatcher():
+    def __init__(self, key_values, weights):
+        # The attributes of the search are lowered and paired with their weight
+        # once, in the declared order of the weights to keep the same rounding
+        self._attributes = tuple(
+            (key, key_values[key].lower(), weight)
+            for key, weight in weights.items()
+            if isinstance(key_values.get(key), str)
+        )
+
+    def match(self, text):
+        return [key for key, attribute, _ in self._attributes if attribute in text]
+
+    def score(self, text):
+        # text must be normalized and lowered, see normalize_description
+        return sum([weight for _, attribute, weight in self._attributes if attribute in text])
+
+def find_most_relevant(args, search_data):
+    helper.logger.info('Finding the most relevant subtitle with BM25')
+
+    score, subtitle = rank_by_relevance(args.SEARCH, search_data)[0]
+
+    helper.logger.info(f'Returning the most relevant for {args.SEARCH} is subtitle [{subtitle.id_subtitle}] with score {score:.2f}')
+    return subtitle.id_subtitle, score
+
+def find_best_match(args, search_data):
+    if args.order_by_relevance:
+        return find_most_relevant(args, search_data)
+
     helper.logger.info('Finding the best match subtitle')
 
-    key_values =  GuessitInfo(args.SEARCH).get_info()
+    key_values = guessit(args.SEARCH)
     normalized_key_values = normalize_key_values(key_values)
 
     # Format the title based on the user input
@@ -698,8 +1529,11 @@ def get_best_match(args, search_data):
         alternative_title = key_values.get('alternative_title', '').replace('aka', '').strip()
         alt_title = (f'{alternative_title} ({key_values.get("year")})' if alternative_title else key_values.get('title')).strip()
 
-    id_subtitle = search_data[0]['id_subtitle']
-    weights = get_attribute_weights()
+    id_subtitle = search_data[0].id_subtitle
+    matcher = AttributeMatcher(normalized_key_values, get_attribute_weights())
+
+    title = title.lower()
+    alt_title = alt_title.lower()
 
     max_score = 0
 
@@ -707,54 +1541,47 @@ def get_best_match(args, search_data):
     previous_title = None
 
     for subtitle in search_data:
-        subtitle_title = subtitle['title'].lower()
+        subtitle_title = subtitle.title.lower()
         if subtitle_title != previous_title:
             previous_title = subtitle_title
             title_values = guessit(subtitle_title)
 
-        if key_values['type'] == 'episode':
-            try:
-                episode_number = f'E{title_values.get("episode"):02d}' if title_values.get('episode') is not None else ''
-            except TypeError:
-                episode_number_input = key_values.get('episode')
-                episode_number_subtitle = title_values.get('episode')
-                if episode_number_input is not None and episode_number_input in episode_number_subtitle:
-                    episode_number = f'E{episode_number_input:02d}'
-            title_filtered = f'{title_values.get("title")} S{title_values.get("season"):02d}{episode_number}'.replace(':', '').replace('.', '').strip()
-            alt_title_filtered = f'{title_values.get("episode_title")}' if title_values.get('episode_title') else title_filtered
-        else:
-            title_filtered = f'{title_values.get("title")} ({title_values.get("year")})' if title_values.get('year') else title_values['title']
-            alternative_title = title_values.get('alternative_title', '').replace('aka', '').strip()
-            alt_title_filtered = (f'{alternative_title} ({title_values.get("year")})' if alternative_title else title_values.get('title')).strip()
-
-        if (title.lower() == title_filtered.lower() or
-            title.lower() == alt_title_filtered.lower() or
-            alt_title.lower() == title_filtered.lower() or
-            alt_title.lower() == alt_title_filtered.lower()):
-            id_subtitle = subtitle['id_subtitle'] if max_score == 0 else id_subtitle
+            # Results are grouped by title, the filtered titles change only with it
+            if key_values['type'] == 'episode':
+                try:
+                    episode_number = f'E{title_values.get("episode"):02d}' if title_values.get('episode') is not None else ''
+                except TypeError:
+                    episode_number_input = key_values.get('episode')
+                    episode_number_subtitle = title_values.get('episode')
+                    if episode_number_input is not None and episode_number_input in episode_number_subtitle:
+                        episode_number = f'E{episode_number_input:02d}'
+                title_filtered = f'{title_values.get("title")} S{title_values.get("season"):02d}{episode_number}'.replace(':', '').replace('.', '').strip()
+                alt_title_filtered = f'{title_values.get("episode_title")}' if title_values.get('episode_title') else title_filtered
+            else:
+                title_filtered = f'{title_values.get("title")} ({title_values.get("year")})' if title_values.get('year') else title_values['title']
+                alternative_title = title_values.get('alternative_title', '').replace('aka', '').strip()
+                alt_title_filtered = (f'{alternative_title} ({title_values.get("year")})' if alternative_title else title_values.get('title')).strip()
 
-            # Search for match in description
-            subtitle_description = subtitle['description'].replace('Blu-Ray', 'BluRay').lower()
-            subtitle_description = subtitle_description.replace('director\'s', 'directors')
+            title_filtered = title_filtered.lower()
+            alt_title_filtered = alt_title_filtered.lower()
 
-            score = 0
-            for key in weights.keys():
-                try:
-                    attribute = normalized_key_values[key].lower()
+        if (title == title_filtered or
+            title == alt_title_filtered or
+            alt_title == title_filtered or
+            alt_title == alt_title_filtered):
+            id_subtitle = subtitle.id_subtitle if max_score == 0 else id_subtitle
 
-                    if attribute in subtitle_description:
-                        score += weights[key]
-                        helper.logger.info(f'Found attribute [{key}] in subtitle [{subtitle["id_subtitle"]}]')
-                except KeyError:
-                    pass
+            # Search for match in description
+            subtitle_description = normalize_description(subtitle.description)
+            score = matcher.score(subtitle_description)
 
             if max_score < score:
                 max_score = score
-                id_subtitle = subtitle['id_subtitle']
-                helper.logger.info(f'New best match with score {max_score:.2f} in subtitle [{id_subtitle}]')
+                id_subtitle = subtitle.id_subtitle
+                helper.logger.info(f'New best match with score {max_score:.2f} in subtitle [{id_subtitle}] with attributes {matcher.match(subtitle_description)}')
 
     helper.logger.info(f'Returning the best match for {args.SEARCH} is subtitle [{id_subtitle}] with score {max_score:.2f}')
-    return id_subtitle
+    return id_subtitle, max_score
 
 def print_comments(args, comments):
     terminal_width, _ = get_terminal_size()
@@ -772,7 +1599,7 @@ def print_comments(args, comments):
 
     table = [['N°', comment_label]]
     for index, comment_text in enumerate(comments, start=1):
-        table.append([index, comment_text.strip()])
+        table.append([index, filter_text(comment_text).strip()])
 
     tablefmt = args.style or DEFAULT_STYLE
     colalign = ['center', 'left']
@@ -843,7 +1670,13 @@ def paginate_comments(args, comments_list, block_size=10, selection=None, descri
             page_info = f'[{current_page}/{total_pages}]'
 
 def clear():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    # On a terminal the renderer draws the next frame over the current one
+    renderer = get_renderer()
+
+    if renderer is not None:
+        renderer.begin_frame()
+    else:
+        os.system('cls' if os.name == 'nt' else 'clear')
 
 def prompt_user_selection(args, menu_name: str, options: list = ['subtitle', 'download', 'pagination']):
     terminal_width, _ = get_terminal_size()
@@ -876,26 +1709,104 @@ def prompt_user_selection(args, menu_name: str, options: list = ['subtitle', 'do
 
     return user_input
 
-def https_request(https, method, url, **kwargs):
-    try:
-        max_retries = 20
-        retry_count = 0
-        while retry_count < max_retries:
+# -- Class HTTPStatusError -- #
+class HTTPStatusError(HTTPError):
+    # An error status, handled like the connection errors of urllib3
+    def __init__(self, status):
+        super().__init__(f'HTTP Error: {status}')
+        self.status = status
+
+def send_request(https, method, url, limit=None, stop=None, **kwargs):
+    # Retries the request as the policy allows and raises the last failure,
+    # background work calls it directly so a failure never ends the program.
+    # Once the stop event is set no other attempt is made
+    policy = get_retry_policy()
+    rate_limiter = get_rate_limiter()
+    endpoint = get_endpoint(method, url)
+
+    # Mirrors answer errors with pages that sniff_archive already rejects
+    is_download = 'www.subdivx.com/sub' in url
+
+    if not policy.breaker.allow(endpoint):
+        raise CircuitOpenError(endpoint)
+
+    attempt = 0
+    while True:
+        if stop is not None and stop.is_set():
+            raise RequestCancelledError(url)
+
+        status = retry_after = None
+        rate_limiter.acquire(limit)
+
+        try:
             response = https.request(method, url, **kwargs)
-            if 400 <= response.status < 600 and 'www.subdivx.com/sub' not in url:
-                retry_count += 1
-                if retry_count == max_retries:
-                    raise Exception(f'HTTP Error: {response.status}')
-                time.sleep(1)
-            else:
-                break
-    except TimeoutError:
-        print(get_translation('timeout_error_check_connection'))
-        helper.logger.error('Timeout error')
+        except HTTPError as error:
+            # Connection and timeout errors are always worth another attempt
+            failure = error
+        else:
+            if is_download or response.status < 400:
+                policy.breaker.record_success(endpoint)
+                return response
+
+            # Give the connection back to the pool, downloads stream their body
+            status = response.status
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            response.drain_conn()
+            response.release_conn()
+
+            if not policy.is_retryable(status):
+                # A client error still proves the endpoint is up
+                if status < 500:
+                    policy.breaker.record_success(endpoint)
+                else:
+                    policy.breaker.record_failure(endpoint)
+                raise HTTPStatusError(status)
+
+            failure = HTTPStatusError(status)
+
+        opened = policy.breaker.record_failure(endpoint)
+        delay = policy.get_delay(attempt, retry_after) if attempt < policy.max_retries and not opened else None
+
+        if delay is None:
+            helper.logger.error(f'Giving up {method} {url} after {attempt + 1} attempts: {failure}')
+            raise failure
+
+        # Slow down every process sharing the bucket, not only this request
+        if status == 429:
+            rate_limiter.pause(limit, delay)
+
+        attempt += 1
+        helper.logger.warning(
+            f'Attempt {attempt} of {method} {url} failed: {failure}, retrying in {delay:.2f} s'
+        )
+
+        if stop is None:
+            time.sleep(delay)
+        elif stop.wait(delay):
+            raise RequestCancelledError(url)
+
+def https_request(https, method, url, limit=None, **kwargs):
+    # limit names the rate limit bucket of the request, None is not limited
+    from urllib3.exceptions import TimeoutError
+
+    try:
+        return send_request(https, method, url, limit, **kwargs)
+    except CircuitOpenError as error:
+        print(get_translation('service_unavailable_try_later'))
+        helper.logger.error(f'{error}')
         sys.exit(1)
-    except MaxRetryError:
-        print(get_translation('connection_error_check_connection'))
-        helper.logger.error('Connection error')
+    except HTTPStatusError as error:
+        print(f'{get_translation("error_occurred")} {error}')
+        helper.logger.error(f'{error}')
+        DataClient().delete_data()
+        sys.exit(1)
+    except HTTPError as error:
+        if isinstance(error, TimeoutError) or isinstance(getattr(error, 'reason', None), TimeoutError):
+            print(get_translation('timeout_error_check_connection'))
+            helper.logger.error('Timeout error')
+        else:
+            print(get_translation('connection_error_check_connection'))
+            helper.logger.error('Connection error')
         sys.exit(1)
     except Exception as e:
         print(f'{get_translation("error_occurred")} {e}')
@@ -903,16 +1814,16 @@ def https_request(https, method, url, **kwargs):
         DataClient().delete_data()
         sys.exit(1)
 
-    return response
-
 # -- Class Cookie -- #
 class Cookie:
     def __init__(self, poolManager, url):
         self.poolManager = poolManager
         self.url = url
 
-    def get_cookie(self):
-        response = https_request(self.poolManager, 'GET', self.url)
+    def get_cookie(self, response=None):
+        # Reuse the headers of a response already requested to the same url
+        if response is None:
+            response = https_request(self.poolManager, 'GET', self.url)
 
         cookie = response.headers.get('Set-Cookie')
         cookie_parts = cookie.split(';')
@@ -949,51 +1860,128 @@ class Token:
 # -- Class DataClient -- #
 class DataClient():
     _PATH_DATA = os.path.join(tempfile.gettempdir(), 'sdx-dl.json')
+    _PATH_LOCK = os.path.join(tempfile.gettempdir(), 'sdx-dl.lock')
+    _WEB_VERSION_TIMEDELTA = timedelta(days=1)
+    _WEB_VERSION_LABEL = b'id="vs">'
+    _CHUNK_SIZE = 8 * 1024
 
     def __init__(self, poolManager=None, header=None, url=None):
         self.poolManager = poolManager
         self.header = header
         self.url = url
 
-    def _get_web_version(self, poolManager, url):
-        response = https_request(poolManager, 'GET', url)
-        response_data = response.data.decode('utf-8')
+    def _get_web_version(self, response):
+        label = self._WEB_VERSION_LABEL
+        buffer = b''
+
+        # Stream the homepage only until the version marker is complete
+        for chunk in response.stream(self._CHUNK_SIZE):
+            buffer += chunk
+            version_start_index = buffer.find(label)
+
+            if version_start_index == -1:
+                buffer = buffer[-len(label):]
+                continue
 
-        label = 'id="vs">'
+            version_start_index += len(label)
+            version_end_index = buffer.find(b'</div>', version_start_index)
 
-        version_start_index = response_data.find(label) + len(label)
-        version_end_index = response_data.find('</div>', version_start_index)
+            if version_end_index != -1:
+                version_text = buffer[version_start_index:version_end_index].decode('utf-8')
+                return version_text.replace('v', '').replace('.', '')
 
-        version_text = response_data[version_start_index:version_end_index]
+        helper.logger.warning('Web version not found on homepage')
+        return ''
 
-        version = version_text.replace('v', '').replace('.', '')
+    def _get_cached_web_version(self):
+        try:
+            self._read_data()
+            expiration_date = datetime.fromisoformat(self._data['web_version_expiration_date'])
+        except (OSError, ValueError, KeyError):
+            return None
 
-        return version
+        if datetime.now() > expiration_date:
+            return None
+
+        return self._data['web_version'] or None
 
     def generate_data(self):
         print(get_translation('generating_data_session'), end='\r')
         helper.logger.info('Generate data session')
-        self.web_version = self._get_web_version(self.poolManager, self.url)
-        self.sdx_cookie = Cookie(self.poolManager, self.url).get_cookie()
+
+        # Cookie and web version come from a single homepage request
+        response = https_request(self.poolManager, 'GET', self.url, preload_content=False)
+        self.sdx_cookie = Cookie(self.poolManager, self.url).get_cookie(response)
+
+        cached_web_version = self._get_cached_web_version()
+
+        if cached_web_version is not None:
+            helper.logger.info('Reuse cached web version')
+            self.web_version = cached_web_version
+            self.web_version_expiration_date = self._data['web_version_expiration_date']
+        else:
+            self.web_version = self._get_web_version(response)
+            self.web_version_expiration_date = (datetime.now() + self._WEB_VERSION_TIMEDELTA).isoformat()
+
+        # Skip the rest of the page, the connection is only kept when little is left
+        discard_response(response)
+
+        # Searches need the version, a session without it is never saved
+        if not self.web_version:
+            print(get_translation('web_version_not_found'))
+            helper.logger.error('Data session not generated, web version not found')
+            sys.exit(1)
+
         self.token_data = Token(self.poolManager, self.url, self.sdx_cookie).get_token_data()
 
     def save_data(self):
         data = {
             'web_version': self.web_version,
+            'web_version_expiration_date': self.web_version_expiration_date,
             'sdx_cookie': self.sdx_cookie,
             'token': self.token_data['token'],
             'expiration_date': self.token_data['expiration_date']
         }
 
-        with open(self._PATH_DATA, 'w') as file:
-            json.dump(data, file, indent=4)
-            file.close()
+        write_json_atomic(self._PATH_DATA, data)
 
     def _read_data(self):
         with open(self._PATH_DATA, 'r') as file:
             self._data = json.load(file)
             file.close()
 
+    def load_or_generate_data(self, new_session=False):
+        # Only one process regenerates the session, the others wait and reuse it
+        session_lock = FileLock(self._PATH_LOCK)
+        waited = not session_lock.acquire(blocking=False)
+
+        if waited:
+            helper.logger.info('Waiting for another process to refresh the data session')
+            session_lock.acquire()
+
+        try:
+            # Stats are shared too, read them only while holding the lock
+            session_stats = SessionStats()
+            if waited:
+                session_stats.increment('waited')
+
+            if new_session:
+                self.delete_data()
+
+            if not self.has_data() or self.is_data_expired():
+                self.generate_data()
+                self.save_data()
+                session_stats.increment('regenerated')
+            else:
+                session_stats.increment('reused')
+
+            session_stats.save()
+            data_session = self.get_data_session()
+        finally:
+            session_lock.release()
+
+        return data_session
+
     def get_data_session(self):
         if self.has_data():
             helper.logger.info('Load data session')
@@ -1004,14 +1992,20 @@ class DataClient():
     def delete_data(self):
         if self.has_data():
             helper.logger.info('Delete data session')
-            os.remove(self._PATH_DATA)
+            try:
+                os.remove(self._PATH_DATA)
+            except FileNotFoundError:
+                pass
 
     def has_data(self):
         return os.path.exists(self._PATH_DATA)
 
     def is_data_expired(self):
         if self.has_data():
-            self._read_data()
+            try:
+                self._read_data()
+            except (OSError, json.JSONDecodeError):
+                return True
 
             expiration_date = datetime.fromisoformat(self._data['expiration_date'])
 
@@ -1020,147 +2014,175 @@ class DataClient():
 
             return False
 
-# -- Class Args -- #
-class Args():
-    def __init__(self, args=None, config=None):
-        super().__init__()
-
-        self.SEARCH = None
-
-        if args is not None:
-            for key, value in args.__dict__.items():
-                setattr(self, key, value)
-
-        if config is not None:
-            for key, value in config.items():
-                setattr(self, key, value)
-            self.SEARCH = args.SEARCH
-
-    def get_args(self):
-        arguments = []
-
-        for attribute, value in self.__dict__.items():
-            if attribute != 'SEARCH' and value is not False and value is not None:
-                arguments.append(f'{attribute}={value}')
-
-        return arguments
-
-# -- Class Config -- #
-class Config():
-    _CONFIG_FILE_NAME = 'config.json'
-
-    def __init__(self):
-        self.config_directory = self._create_config_directory()
-        self.config_path = os.path.join(self.config_directory, self._CONFIG_FILE_NAME)
-
-    def _create_config_directory(self):
-        import platform
-        platform_name = platform.system()
-
-        local_appdata = os.getenv('LOCALAPPDATA')
+# -- Class SearchResult -- #
+class SearchResult():
+    # One row of the search results, slots keep thousands of them compact.
+    # Title and description keep the raw text sent by the server and are
+    # sanitized the first time the row is rendered or scored
+    __slots__ = (
+        'id_subtitle', 'raw_title', 'raw_description', 'downloads', 'uploader', 'upload_ordinal',
+        '_title', '_description'
+    )
 
-        directory_paths = {
-            'Linux': '~/.config/subdivx-dl/',
-            'Darwin': '~/Library/Application Support/subdivx-dl/',
-            'Windows': f'{local_appdata}\\subdivx-dl\\'
+    def __init__(self, id_subtitle, raw_title, raw_description, downloads, uploader, upload_ordinal):
+        self.id_subtitle = id_subtitle
+        self.raw_title = raw_title
+        self.raw_description = raw_description
+        self.downloads = downloads
+        self.uploader = uploader
+        self.upload_ordinal = upload_ordinal
+        self._title = None
+        self._description = None
+
+    @property
+    def title(self):
+        if self._title is None:
+            self._title = filter_text(self.raw_title)
+        return self._title
+
+    @property
+    def description(self):
+        if self._description is None:
+            self._description = filter_text(self.raw_description)
+        return self._description
+
+    @property
+    def upload_date(self):
+        if not self.upload_ordinal:
+            return '-'
+        return datetime.fromordinal(self.upload_ordinal).strftime('%d/%m/%Y')
+
+    def to_dict(self):
+        return {
+            'id_subtitle': self.id_subtitle,
+            'raw_title': self.raw_title,
+            'raw_description': self.raw_description,
+            'downloads': self.downloads,
+            'uploader': self.uploader,
+            'upload_ordinal': self.upload_ordinal
         }
 
-        config_directory = os.path.expanduser(directory_paths[platform_name])
-        os.makedirs(config_directory, exist_ok=True)
-
-        return config_directory
-
-    def save_config(self, args):
-        args_copy = args.__dict__.copy()
-
-        # Remove keys that are not needed in the config file
-        keys_to_remove = {'SEARCH', 'load_config', 'save_config', 'check_update'}
-
-        # Remove keys that have empty values
-        keys_to_remove.update(key for key, value in args_copy.items() if not value)
-
-        # Remove the identified keys
-        for key in keys_to_remove:
-            args_copy.pop(key, None)
-
-        with open(self.config_path, 'w') as file:
-            json.dump(args_copy, file, indent=4, sort_keys=True)
-
-        helper.logger.info(f'Save configuration file {self.config_path}')
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+# -- Class SearchResults -- #
+class SearchResults():
+    # Results of a search, rows are pulled from the response as they are
+    # needed so the first page is shown before the last row is read
+    def __init__(self, rows, on_complete=None):
+        self.on_complete = on_complete
+        self._rows = []
+        self._pending = iter(rows)
+        self._error = None
+
+    def _fill(self, count=None):
+        # Read rows until count are available, all of them when count is None.
+        # Rows cut short by an error are never complete, every later access
+        # raises the error again instead of returning them
+        if self._error is not None:
+            raise self._error
+
+        while self._pending is not None and (count is None or len(self._rows) < count):
+            try:
+                row = next(self._pending, None)
+            except Exception as error:
+                self._pending = None
+                self._error = error
+                raise
+
+            if row is not None:
+                self._rows.append(row)
+                continue
 
-    def load_config(self):
-        if not os.path.exists(self.config_path):
-            helper.logger.info('Not found configuration file, usage default values')
-            return {}
+            self._pending = None
+            if self.on_complete:
+                self.on_complete(self._rows)
 
-        with open(self.config_path, 'r') as file:
-            helper.logger.info(f'Load configuration file {self.config_path}')
-            return json.load(file)
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            bounds = (index.start or 0, index.stop)
+            self._fill(index.stop if all(bound is not None and bound >= 0 for bound in bounds) else None)
+        else:
+            self._fill(index + 1 if index >= 0 else None)
+        return self._rows[index]
 
-# -- Class TTLCache -- #
-# See: https://medium.com/@denis.volokh/caching-methods-implementations-and-comparisons-in-python-7d29a2b0cd80
+    def __iter__(self):
+        index = 0
+        while True:
+            self._fill(index + 1)
+            if index >= len(self._rows):
+                return
+            yield self._rows[index]
+            index += 1
+
+    def __len__(self):
+        self._fill()
+        return len(self._rows)
+
+    def __bool__(self):
+        self._fill(1)
+        return bool(self._rows)
+
+# -- Class CommentsPrefetcher -- #
+class CommentsPrefetcher():
+    def __init__(self, poolManager, url, comments_cache=None, max_workers=COMMENTS_PREFETCH_WORKERS):
+        self.poolManager = poolManager
+        self.url = url
+        self.comments_cache = comments_cache
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._results = {}
+        self._running = {}
+
+        # Daemon workers never hold back the exit of the program
+        for _ in range(max_workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def prefetch(self, subtitle_ids):
+        # A new page invalidates the queued fetches of the previous one
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+
+        for subtitle_id in subtitle_ids:
+            if subtitle_id not in self._results:
+                self._queue.put((generation, subtitle_id))
+
+    def _worker(self):
+        while True:
+            generation, subtitle_id = self._queue.get()
 
-class TTLCache:
-    def __init__(self, capacity, ttl):
-        # Initialize the TTLCache with a given capacity and time-to-live (ttl)
-        self.capacity = capacity
-        self.ttl = ttl
-        # cache stores the key-value pairs
-        self.cache = {}
-        # timestamps stores the time when each key was added or last updated
-        self.timestamps = {}
+            with self._lock:
+                if (generation != self._generation or
+                    subtitle_id in self._results or
+                    subtitle_id in self._running):
+                    continue
+                done = self._running[subtitle_id] = threading.Event()
 
-    def get(self, key):
-        # Retrieve the value associated with 'key' if it hasn't expired
-        if key in self.cache:
-            # Check if the key has expired by comparing current time with its timestamp
-            if time.time() - self.timestamps[key] < self.ttl:
-                # Return the value if it's still valid
-                return self.cache[key]
-            else:
-                # If the key has expired, remove it from cache and timestamps
-                del self.cache[key]
-                del self.timestamps[key]
-        # Return -1 if the key is not found or has expired
-        return -1
-
-    def put(self, key, value):
-        # Add or update a key-value pair in the cache
-        if len(self.cache) >= self.capacity and key not in self.cache:
-            # Evict items if the cache is full and the key is not already present
-            self.evict()
-        # Store the value in the cache and record the current timestamp
-        self.cache[key] = value
-        self.timestamps[key] = time.time()
-
-    def evict(self):
-        # Evict expired items from the cache
-        current_time = time.time()
-        # Find all keys that have expired
-        expired = [k for k, t in self.timestamps.items() if current_time - t >= self.ttl]
-        for key in expired:
-            # Remove expired keys from cache and timestamps
-            del self.cache[key]
-            del self.timestamps[key]
-        if not expired and self.cache:
-            # If no expired items are found, evict the oldest item in the cache
-            oldest = min(self.timestamps, key=self.timestamps.get)
-            del self.cache[oldest]
-            del self.timestamps[oldest]
-
-# -- Class GuessitInfo -- #
-class GuessitInfo:
-    _instance = None
-    _SHARED_INFO = None
-
-    def __new__(cls, search_term):
-        if not cls._instance:
-            cls._instance = super(GuessitInfo, cls).__new__(cls)
-        return cls._instance
-
-    def __init__(self, search_term):
-        if self._SHARED_INFO is None:
-            self._SHARED_INFO = guessit(search_term)
-
-    def get_info(self):
-        return self._SHARED_INFO
\ No newline at end of file
+            try:
+                comments = get_comments(self.poolManager, self.url, subtitle_id, self.comments_cache, quiet=True)
+            except Exception as error:
+                helper.logger.warning(f'Prefetch of comments for subtitle [{subtitle_id}] failed: {error}')
+                comments = None
+
+            with self._lock:
+                if comments is not None:
+                    self._results[subtitle_id] = comments
+                del self._running[subtitle_id]
+            done.set()
+
+    def get(self, subtitle_id):
+        # Wait for a fetch already in flight instead of requesting again
+        with self._lock:
+            done = self._running.get(subtitle_id)
+
+        if done is not None:
+            done.wait()
+
+        comments = self._results.get(subtitle_id)
+        if comments is not None:
+            return comments
+
+        return get_comments(self.poolManager, self.url, subtitle_id, self.comments_cache)